@@ -52,6 +52,18 @@ def clean_database():
     db.create_all()
 
 
+@pytest.fixture(scope="session")
+def selenium_driver():
+    # Import diferido: solo los tests de Selenium necesitan el navegador.
+    # Con pytest-xdist cada worker es un proceso con su propia sesión, así que
+    # cada worker obtiene su propio navegador persistente.
+    from core.selenium.common import close_driver, default_profile_dir, initialize_driver
+
+    driver = initialize_driver(profile_dir=default_profile_dir())
+    yield driver
+    close_driver(driver)
+
+
 def login(test_client, email, password):
     """
     Authenticates the user with the credentials provided.
@@ -1,7 +1,9 @@
 import logging
+import os
 import xml.etree.ElementTree as ET
 from datetime import datetime
 from enum import Enum
+from functools import lru_cache
 
 from flask import request
 from sqlalchemy import Enum as SQLAlchemyEnum
@@ -163,23 +165,18 @@ class BaseDataset(db.Model):
 
     def get_file_total_size_for_human(self) -> str:
         # Uso local para evitar import circular
-        size = self.get_file_total_size()
-        if size < 1024:
-            return f"{size} bytes"
-        elif size < 1024**2:
-            return f"{round(size / 1024, 2)} KB"
-        elif size < 1024**3:
-            return f"{round(size / (1024 ** 2), 2)} MB"
-        return f"{round(size / (1024 ** 3), 2)} GB"
+        from app.modules.dataset.services import SizeService
+
+        return SizeService.get_human_readable_size(self.get_file_total_size())
 
     def get_zenodo_url(self):
         return f"https://zenodo.org/record/{self.ds_meta_data.deposition_id}" if self.ds_meta_data.dataset_doi else None
 
     def get_uvlhub_doi(self):
         # evitamos import circular; el servicio construye la URL pública
-        from app.modules.dataset.services import DataSetService
+        from app.modules.dataset.services import build_uvlhub_doi
 
-        return DataSetService().get_uvlhub_doi(self)
+        return build_uvlhub_doi(self.ds_meta_data.dataset_doi)
 
     def to_dict(self):
         return {
@@ -245,6 +242,62 @@ class BaseDataset(db.Model):
         return f"Dataset<{self.id}:{self.dataset_kind}>"
 
 
+# ---------------------------
+# Métricas por fichero para las versiones
+# ---------------------------
+# Se cachean por (ruta, mtime, tamaño): cada métrica de una versión, y las versiones siguientes
+# mientras el fichero no cambie, reutilizan un único parseo
+FILE_STATS_CACHE_SIZE = 256
+
+
+def _cached_file_stats(stats_fn, file_path: str):
+    st = os.stat(file_path)
+    return stats_fn(file_path, st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=FILE_STATS_CACHE_SIZE)
+def _gpx_file_stats(file_path: str, mtime_ns: int, size: int) -> dict:
+    """Distancia, desniveles y número de puntos de un GPX (sin las coordenadas)."""
+    from app.modules.dataset.handlers.gpx_handler import GPXHandler
+
+    data = GPXHandler().parse_gpx(file_path)
+    if not data:
+        return {}
+    return {key: data.get(key, 0) for key in ("distance", "elevation_gain", "elevation_loss", "points_count")}
+
+
+@lru_cache(maxsize=FILE_STATS_CACHE_SIZE)
+def _uvl_file_stats(file_path: str, mtime_ns: int, size: int) -> tuple:
+    """(features, constraints) de un modelo UVL, contados en una sola lectura."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    features = constraints = 0
+    in_features_section = in_constraints_section = False
+    for line in content.split("\n"):
+        stripped = line.strip()
+
+        if stripped == "constraints":
+            in_constraints_section = True
+        elif in_constraints_section and stripped:
+            constraints += 1
+
+        if stripped == "features":
+            in_features_section = True
+            continue
+
+        if stripped == "constraints" or (in_features_section and stripped and not line.startswith((" ", "\t"))):
+            in_features_section = False
+
+        if in_features_section and stripped:
+            if stripped not in ["mandatory", "optional", "alternative", "or"]:
+                feature_name = stripped.strip('"')
+                if feature_name:
+                    features += 1
+
+    return features, constraints
+
+
 # ---------------------------
 # Subclases concretas (single-table)
 # ---------------------------
@@ -263,65 +316,23 @@ class UVLDataset(BaseDataset):
     def specific_template(self) -> str | None:
         return "dataset/blocks/uvl_tree.html"
 
-    def calculate_total_features(self):
-        """Calcular total de features en todos los modelos UVL"""
+    def _sum_uvl_stat(self, index: int) -> int:
         total = 0
-        for fm in self.feature_models:
-            for file in fm.files:
-                if file.name.lower().endswith(".uvl"):
-                    try:
-                        file_path = file.get_path()
-                        with open(file_path, "r", encoding="utf-8") as f:
-                            content = f.read()
-                            in_features_section = False
-
-                            for line in content.split("\n"):
-                                stripped = line.strip()
-
-                                if stripped == "features":
-                                    in_features_section = True
-                                    continue
-
-                                if stripped == "constraints" or (
-                                    in_features_section and stripped and not line.startswith((" ", "\t"))
-                                ):
-                                    in_features_section = False
-
-                                if in_features_section and stripped:
-                                    if stripped not in ["mandatory", "optional", "alternative", "or"]:
-                                        feature_name = stripped.strip('"')
-                                        if feature_name:
-                                            total += 1
-
-                    except Exception as e:
-                        logger.warning(f"Could not parse UVL file {file.name}: {str(e)}")
+        for file in self.files():
+            if file.name.lower().endswith(".uvl"):
+                try:
+                    total += _cached_file_stats(_uvl_file_stats, file.get_path())[index]
+                except Exception as e:
+                    logger.warning(f"Could not parse UVL file {file.name}: {str(e)}")
         return total
 
+    def calculate_total_features(self):
+        """Calcular total de features en todos los modelos UVL"""
+        return self._sum_uvl_stat(0)
+
     def calculate_total_constraints(self):
         """Calcular total de constraints en todos los modelos UVL"""
-        total = 0
-        for fm in self.feature_models:
-            for file in fm.files:
-                if file.name.lower().endswith(".uvl"):
-                    try:
-                        file_path = file.get_path()
-                        with open(file_path, "r", encoding="utf-8") as f:
-                            content = f.read()
-                            in_constraints_section = False
-
-                            for line in content.split("\n"):
-                                stripped = line.strip()
-
-                                if stripped == "constraints":
-                                    in_constraints_section = True
-                                    continue
-
-                                if in_constraints_section and stripped:
-                                    total += 1
-
-                    except Exception as e:
-                        logger.warning(f"Could not parse UVL file {file.name}: {str(e)}")
-        return total
+        return self._sum_uvl_stat(1)
 
 
 class GPXDataset(BaseDataset):
@@ -343,69 +354,28 @@ class GPXDataset(BaseDataset):
         except Exception:
             return False
 
-    def calculate_total_distance(self):
-        """Calcular distancia total de todos los tracks"""
-        from app.modules.dataset.handlers.gpx_handler import GPXHandler
-
-        handler = GPXHandler()
+    def _sum_gpx_stat(self, key: str):
         total = 0
-
-        for fm in self.feature_models:
-            for file in fm.files:
-                if file.name.lower().endswith(".gpx"):
-                    file_path = file.get_path()
-                    data = handler.parse_gpx(file_path)
-                    if data:
-                        total += data.get("distance", 0)
+        for file in self.files():
+            if file.name.lower().endswith(".gpx"):
+                total += _cached_file_stats(_gpx_file_stats, file.get_path()).get(key, 0)
         return total
 
+    def calculate_total_distance(self):
+        """Calcular distancia total de todos los tracks"""
+        return self._sum_gpx_stat("distance")
+
     def calculate_total_elevation_gain(self):
         """Calcular desnivel positivo total"""
-        from app.modules.dataset.handlers.gpx_handler import GPXHandler
-
-        handler = GPXHandler()
-        total = 0
-
-        for fm in self.feature_models:
-            for file in fm.files:
-                if file.name.lower().endswith(".gpx"):
-                    file_path = file.get_path()
-                    data = handler.parse_gpx(file_path)
-                    if data:
-                        total += data.get("elevation_gain", 0)
-        return total
+        return self._sum_gpx_stat("elevation_gain")
 
     def calculate_total_elevation_loss(self):
         """Calcular desnivel negativo total"""
-        from app.modules.dataset.handlers.gpx_handler import GPXHandler
-
-        handler = GPXHandler()
-        total = 0
-
-        for fm in self.feature_models:
-            for file in fm.files:
-                if file.name.lower().endswith(".gpx"):
-                    file_path = file.get_path()
-                    data = handler.parse_gpx(file_path)
-                    if data:
-                        total += data.get("elevation_loss", 0)
-        return total
+        return self._sum_gpx_stat("elevation_loss")
 
     def count_total_points(self):
         """Contar total de puntos GPS"""
-        from app.modules.dataset.handlers.gpx_handler import GPXHandler
-
-        handler = GPXHandler()
-        total = 0
-
-        for fm in self.feature_models:
-            for file in fm.files:
-                if file.name.lower().endswith(".gpx"):
-                    file_path = file.get_path()
-                    data = handler.parse_gpx(file_path)
-                    if data:
-                        total += data.get("points_count", 0)
-        return total
+        return self._sum_gpx_stat("points_count")
 
     def count_tracks(self):
         """Contar número de tracks GPX"""
@@ -427,6 +397,9 @@ class DSDownloadRecord(db.Model):
     download_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     download_cookie = db.Column(db.String(36), nullable=False)  # UUID4
 
+    # Índice de cobertura para los recuentos por ventana de fechas de trending
+    __table_args__ = (db.Index("ix_ds_download_record_download_date_dataset_id", "download_date", "dataset_id"),)
+
     def __repr__(self):
         return (
             f"<Download id={self.id} dataset_id={self.dataset_id} "
@@ -441,6 +414,9 @@ class DSViewRecord(db.Model):
     view_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     view_cookie = db.Column(db.String(36), nullable=False)  # UUID4
 
+    # Índice de cobertura para los recuentos por ventana de fechas de trending
+    __table_args__ = (db.Index("ix_ds_view_record_view_date_dataset_id", "view_date", "dataset_id"),)
+
     def __repr__(self):
         return f"<View id={self.id} dataset_id={self.dataset_id} date={self.view_date} cookie={self.view_cookie}>"
 
@@ -1,7 +1,8 @@
 import logging
 import os
-import xml.etree.ElementTree as ET
+from functools import lru_cache
 from typing import Type
+from xml.parsers import expat
 
 from flask_wtf import FlaskForm
 
@@ -10,6 +11,8 @@ from app.modules.dataset.models import BaseDataset, GPXDataset, UVLDataset
 
 logger = logging.getLogger(__name__)
 
+CHECKSUM_CHUNK_SIZE = 1 << 20  # 1 MiB
+
 
 # === Handlers para validación por tipo ===
 class DataTypeHandler:
@@ -21,6 +24,19 @@ class DataTypeHandler:
     def validate(self, filepath: str) -> bool:
         raise NotImplementedError
 
+    def validate_and_checksum(self, filepath: str, hasher) -> int:
+        """
+        Valida el fichero y vuelca su contenido en `hasher`; devuelve el tamaño en bytes.
+        Por defecto son dos lecturas; los handlers que validan en streaming lo hacen en una sola.
+        """
+        self.validate(filepath)
+        size = 0
+        with open(filepath, "rb") as f:
+            while chunk := f.read(CHECKSUM_CHUNK_SIZE):
+                hasher.update(chunk)
+                size += len(chunk)
+        return size
+
 
 class UVLHandler(DataTypeHandler):
     ext = ".uvl"
@@ -41,6 +57,51 @@ class UVLHandler(DataTypeHandler):
         return True
 
 
+class _GPXStructureCheck:
+    """
+    Comprueba en streaming que la raíz es <gpx> y que hay al menos un <trk> o <wpt>.
+    Usa expat directamente (sin crear elementos): tras el primer <trk>/<wpt> deja de mirar etiquetas.
+    """
+
+    def __init__(self):
+        self.found = False
+        self._root_checked = False
+        self._parser = expat.ParserCreate(namespace_separator="}")
+        self._parser.StartElementHandler = self._start
+
+    def _start(self, name, attrs):
+        tag = name.rsplit("}", 1)[-1]
+
+        # Verificar que es un archivo GPX válido
+        if not self._root_checked:
+            if not tag.endswith("gpx"):
+                raise ValueError("Invalid GPX file: root element is not <gpx>")
+            self._root_checked = True
+
+        # Verificar que tiene al menos un track o waypoint
+        if tag in ("trk", "wpt"):
+            self.found = True
+            self._parser.StartElementHandler = None
+
+    def feed(self, chunk: bytes) -> bool:
+        """Procesa un bloque; devuelve True en cuanto el fichero se puede dar por válido."""
+        try:
+            self._parser.Parse(chunk, False)
+        except expat.ExpatError as e:
+            # Un error de sintaxis posterior al primer <trk>/<wpt> no invalida el fichero
+            if not self.found:
+                raise ValueError(f"Invalid GPX file: XML parsing error - {str(e)}")
+        return self.found
+
+    def finish(self):
+        """Fin del fichero sin <trk>/<wpt>: aflora los errores de sintaxis pendientes o lo rechaza."""
+        try:
+            self._parser.Parse(b"", True)
+        except expat.ExpatError as e:
+            raise ValueError(f"Invalid GPX file: XML parsing error - {str(e)}")
+        raise ValueError("Invalid GPX file: no tracks or waypoints found")
+
+
 class GPXHandler(DataTypeHandler):
     ext = ".gpx"
     name = "gpx"
@@ -51,25 +112,33 @@ class GPXHandler(DataTypeHandler):
         if os.path.getsize(filepath) == 0:
             raise ValueError("File is empty")
 
-        try:
-            tree = ET.parse(filepath)
-            root = tree.getroot()
-
-            # Verificar que es un archivo GPX válido
-            if not root.tag.endswith("gpx"):
-                raise ValueError("Invalid GPX file: root element is not <gpx>")
+        # Se recorre el XML en streaming y se para en cuanto aparece el primer <trk> o <wpt>
+        check = _GPXStructureCheck()
+        with open(filepath, "rb") as f:
+            while chunk := f.read(CHECKSUM_CHUNK_SIZE):
+                if check.feed(chunk):
+                    return True
+        check.finish()
 
-            # Verificar que tiene al menos un track o waypoint
-            namespaces = {"gpx": "http://www.topografix.com/GPX/1/1"}
-            tracks = root.findall(".//gpx:trk", namespaces) or root.findall(".//trk")
-            waypoints = root.findall(".//gpx:wpt", namespaces) or root.findall(".//wpt")
+    def validate_and_checksum(self, filepath: str, hasher) -> int:
+        # Una sola lectura: cada bloque va al hash y, hasta encontrar el primer <trk>/<wpt>, al parser XML
+        if not os.path.exists(filepath):
+            raise ValueError("File not found")
 
-            if not tracks and not waypoints:
-                raise ValueError("Invalid GPX file: no tracks or waypoints found")
+        check = _GPXStructureCheck()
+        size = 0
+        with open(filepath, "rb") as f:
+            while chunk := f.read(CHECKSUM_CHUNK_SIZE):
+                hasher.update(chunk)
+                size += len(chunk)
+                if not check.found:
+                    check.feed(chunk)
 
-            return True
-        except ET.ParseError as e:
-            raise ValueError(f"Invalid GPX file: XML parsing error - {str(e)}")
+        if size == 0:
+            raise ValueError("File is empty")
+        if not check.found:
+            check.finish()
+        return size
 
 
 # === Descriptor de tipo de dataset ===
@@ -142,7 +211,12 @@ def get_descriptor(kind: str) -> DatasetTypeDescriptor:
 def infer_kind_from_filename(filename: str) -> str:
     """Infiere el tipo de dataset desde la extensión del archivo."""
     _, ext = os.path.splitext(filename.lower())
+    return _kind_for_extension(ext)
+
 
+# El registro no cambia tras la importación, así que estas búsquedas se memorizan
+@lru_cache(maxsize=64)
+def _kind_for_extension(ext: str) -> str:
     for kind, descriptor in DATASET_TYPE_REGISTRY.items():
         if ext in descriptor.file_extensions:
             return kind
@@ -151,12 +225,13 @@ def infer_kind_from_filename(filename: str) -> str:
     return "base"
 
 
-def get_allowed_extensions() -> list:
-    """Retorna todas las extensiones permitidas."""
+@lru_cache(maxsize=1)
+def get_allowed_extensions() -> tuple:
+    """Retorna todas las extensiones permitidas (en minúsculas, con el punto)."""
     extensions = []
     for descriptor in DATASET_TYPE_REGISTRY.values():
         extensions.extend(descriptor.file_extensions)
-    return extensions
+    return tuple(extensions)
 
 
 def get_all_descriptors() -> dict:
@@ -3,8 +3,10 @@ from datetime import datetime, timezone
 from typing import Optional
 
 from flask_login import current_user
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, insert, literal, select
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
 
+from app.modules.auth.models import User
 from app.modules.dataset.models import BaseDataset  # 👈 usar el mapper base para consultas polimórficas
 from app.modules.dataset.models import (
     Author,
@@ -13,6 +15,7 @@ from app.modules.dataset.models import (
     DSMetaData,
     DSViewRecord,
 )
+from app.modules.featuremodel.models import FeatureModel
 from core.repositories.BaseRepository import BaseRepository
 
 logger = logging.getLogger(__name__)
@@ -22,6 +25,39 @@ class AuthorRepository(BaseRepository):
     def __init__(self):
         super().__init__(Author)
 
+    def create_many(self, rows: list) -> None:
+        """
+        Inserta varios autores (dicts de columnas) en un único INSERT con varias filas, sin commit.
+        Los objetos no se cargan en la sesión: las relaciones `authors` se leen de la BD al acceder a ellas.
+        """
+        if rows:
+            self.session.execute(insert(self.model), rows)
+
+
+def _insert_record_if_new(session, date_column, cookie_column, user_id, dataset_id, cookie) -> bool:
+    """
+    Inserta un registro de visita/descarga salvo que ya exista para (usuario, dataset, cookie).
+    Comprobación e inserción van en una única sentencia INSERT ... SELECT ... WHERE NOT EXISTS.
+    Devuelve True si se insertó un registro nuevo.
+    """
+    model = date_column.class_
+    user_filter = model.user_id.is_(None) if user_id is None else model.user_id == user_id
+    already_recorded = (
+        select(model.id).where(user_filter, model.dataset_id == dataset_id, cookie_column == cookie).exists()
+    )
+    values = select(
+        literal(user_id, model.user_id.type),
+        literal(dataset_id, model.dataset_id.type),
+        literal(datetime.now(timezone.utc), date_column.type),
+        literal(cookie, cookie_column.type),
+    ).where(~already_recorded)
+
+    result = session.execute(
+        insert(model).from_select(["user_id", "dataset_id", date_column.key, cookie_column.key], values)
+    )
+    session.commit()
+    return result.rowcount > 0
+
 
 class DSDownloadRecordRepository(BaseRepository):
     def __init__(self):
@@ -31,6 +67,12 @@ class DSDownloadRecordRepository(BaseRepository):
         max_id = self.model.query.with_entities(func.max(self.model.id)).scalar()
         return max_id if max_id is not None else 0
 
+    def create_if_not_exists(self, user_id: Optional[int], dataset_id: int, download_cookie: str) -> bool:
+        """Registra la descarga salvo que ya exista para (usuario, dataset, cookie). True si se insertó."""
+        return _insert_record_if_new(
+            self.session, self.model.download_date, self.model.download_cookie, user_id, dataset_id, download_cookie
+        )
+
 
 class DSMetaDataRepository(BaseRepository):
     def __init__(self):
@@ -63,6 +105,12 @@ class DSViewRecordRepository(BaseRepository):
             view_cookie=user_cookie,
         )
 
+    def create_if_not_exists(self, user_id: Optional[int], dataset_id: int, view_cookie: str) -> bool:
+        """Registra la visita salvo que ya exista para (usuario, dataset, cookie). True si se insertó."""
+        return _insert_record_if_new(
+            self.session, self.model.view_date, self.model.view_cookie, user_id, dataset_id, view_cookie
+        )
+
 
 class DataSetRepository(BaseRepository):
     def __init__(self):
@@ -85,6 +133,50 @@ class DataSetRepository(BaseRepository):
             .all()
         )
 
+    def get_with_feature_models(self, dataset_id: int) -> Optional[BaseDataset]:
+        """Recarga el dataset con sus feature models y sus metadatos ya cargados (sin lazy loads)."""
+        return (
+            self.model.query.options(selectinload(BaseDataset.feature_models).selectinload(FeatureModel.fm_meta_data))
+            .filter(BaseDataset.id == dataset_id)
+            .populate_existing()
+            .first()
+        )
+
+    def get_with_details(self, dataset_id: int) -> Optional[BaseDataset]:
+        """Dataset con sus metadatos y sus feature models (con metadatos y ficheros) en una consulta y dos selectin."""
+        return (
+            self.model.query.options(
+                joinedload(BaseDataset.ds_meta_data),
+                selectinload(BaseDataset.feature_models).options(
+                    selectinload(FeatureModel.fm_meta_data),
+                    selectinload(FeatureModel.files),
+                ),
+            )
+            .filter(BaseDataset.id == dataset_id)
+            .first()
+        )
+
+    def get_with_files(self, dataset_id: int) -> Optional[BaseDataset]:
+        """Dataset con sus feature models y ficheros precargados (dos selectin en lugar de una consulta por modelo)."""
+        return (
+            self.model.query.options(selectinload(BaseDataset.feature_models).selectinload(FeatureModel.files))
+            .filter(BaseDataset.id == dataset_id)
+            .first()
+        )
+
+    def get_by_doi_with_details(self, doi: str) -> Optional[BaseDataset]:
+        """Dataset publicado con ese DOI y lo que pinta su página (metadatos, autores, ficheros, perfil del dueño)."""
+        return (
+            self.model.query.join(DSMetaData)
+            .options(
+                contains_eager(BaseDataset.ds_meta_data).selectinload(DSMetaData.authors),
+                selectinload(BaseDataset.feature_models).selectinload(FeatureModel.files),
+                joinedload(BaseDataset.user).joinedload(User.profile),
+            )
+            .filter(DSMetaData.dataset_doi == doi)
+            .first()
+        )
+
     def get_unsynchronized_dataset(self, current_user_id: int, dataset_id: int):
         return (
             self.model.query.join(DSMetaData)
@@ -1,31 +1,60 @@
-import json
 import logging
 import os
+import re
 import shutil
-import tempfile
+import threading
+import time
 import uuid
-from datetime import datetime, timezone
-from zipfile import ZipFile
-
-from flask import abort, flash, jsonify, make_response, redirect, render_template, request, send_from_directory, url_for
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from flask import (
+    Response,
+    abort,
+    current_app,
+    flash,
+    g,
+    jsonify,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    stream_with_context,
+    url_for,
+)
 from flask_login import current_user, login_required
+from sqlalchemy import Integer, String, column, text
+from streaming_form_data import ParseFailedException, StreamingFormDataParser
+from streaming_form_data.targets import FileTarget
+from werkzeug.utils import secure_filename
 
 from app import db
 from app.modules.dataset import dataset_bp
 from app.modules.dataset.forms import DataSetForm
-from app.modules.dataset.models import BaseDataset, DSDownloadRecord
+from app.modules.dataset.handlers.gpx_handler import GPXHandler
+from app.modules.dataset.registry import (
+    get_allowed_extensions,
+    get_descriptor,
+    infer_kind_from_filename,
+)
 from app.modules.dataset.services import (
+    UPLOAD_COPY_BUFFER_SIZE,
     AuthorService,
     DataSetService,
     DOIMappingService,
     DSDownloadRecordService,
     DSMetaDataService,
     DSViewRecordService,
-    calculate_checksum_and_size,
+    save_uploaded_file_with_checksum,
 )
+from app.modules.featuremodel.models import FeatureModel, FMMetaData
+from app.modules.hubfile.models import Hubfile
 from app.modules.recommendation.services import RecommendationService
 from app.modules.versioning.services import VersionService
 from app.modules.zenodo.services import ZenodoService
+from core.serialisers.serializer import encode_json, json_response
 
 logger = logging.getLogger(__name__)
 
@@ -36,8 +65,172 @@ dsmetadata_service = DSMetaDataService()
 zenodo_service = ZenodoService()
 doi_mapping_service = DOIMappingService()
 ds_view_record_service = DSViewRecordService()
+ds_download_record_service = DSDownloadRecordService()
 recommendation_service = RecommendationService()
 
+# Variables de entorno fijas durante la vida del proceso: se leen una vez al importar
+WORKING_DIR = os.getenv("WORKING_DIR", "")
+FLASK_ENV = os.getenv("FLASK_ENV", "development")
+
+# Segundos mínimos entre dos sincronizaciones con Zenodo de la misma deposition
+ZENODO_SYNC_TTL = 300
+ZENODO_SYNC_CACHE_SIZE = 1024
+# Orden de inserción = antigüedad de la última sincronización; se descartan primero las más antiguas
+_zenodo_last_sync = OrderedDict()
+_zenodo_last_sync_lock = threading.Lock()
+_zenodo_sync_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="zenodo-sync")
+_record_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ds-record")
+
+# Tamaño de los bloques leídos de request.stream al parsear subidas multipart
+UPLOAD_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Fichero de la carpeta temporal que guarda el tipo (uvl/gpx) de los archivos ya subidos
+TEMP_KIND_FILENAME = ".kind"
+
+# Tracks GPX ya parseados que se mantienen en memoria (cada entrada guarda el JSON completo)
+GPX_PAYLOAD_CACHE_SIZE = 128
+
+# <proyecto>/uploads (current_app.root_path apunta a <proyecto>/app); se fija al registrar el blueprint
+_UPLOAD_ROOT = "uploads"
+
+
+@dataset_bp.record_once
+def _init_upload_root(state):
+    global _UPLOAD_ROOT
+    _UPLOAD_ROOT = os.path.join(os.path.dirname(state.app.root_path), "uploads")
+
+
+_DOI_VERSION_RE = re.compile(r"\.v(\d+)$")
+
+
+@lru_cache(maxsize=1024)
+def _doi_version(doi: str) -> int:
+    """Extrae el número de versión de un DOI de Zenodo ('...v3' -> 3); 1 si no lo tiene."""
+    match = _DOI_VERSION_RE.search(doi)
+    return int(match.group(1)) if match else 1
+
+
+def _sync_zenodo_metadata(app, ds_meta_data_id: int, deposition_id: int):
+    """Trae título, descripción, tags y DOI desde Zenodo/Fakenodo y los guarda si cambiaron."""
+    with app.app_context():
+        try:
+            logger.info(f"Syncing metadata from Zenodo for deposition {deposition_id}")
+            zenodo_data = zenodo_service.get_deposition(deposition_id)
+
+            if not zenodo_data or "metadata" not in zenodo_data:
+                return
+
+            ds_meta_data = dsmetadata_service.get_by_id(ds_meta_data_id)
+            if not ds_meta_data:
+                return
+
+            metadata = zenodo_data["metadata"]
+            dirty = False
+
+            # Actualizar título si cambió
+            if metadata.get("title") and metadata["title"] != ds_meta_data.title:
+                ds_meta_data.title = metadata["title"]
+                dirty = True
+
+            # Actualizar descripción si cambió
+            if metadata.get("description") and metadata["description"] != ds_meta_data.description:
+                ds_meta_data.description = metadata["description"]
+                dirty = True
+
+            # Actualizar tags si cambiaron
+            if metadata.get("keywords"):
+                zenodo_tags = [t for t in metadata["keywords"] if t.lower() != "uvlhub"]
+                new_tags = ", ".join(zenodo_tags)
+                if new_tags != (ds_meta_data.tags or ""):
+                    ds_meta_data.tags = new_tags
+                    dirty = True
+
+            # NO actualizar el DOI desde Zenodo si ya tenemos uno más reciente
+            zenodo_doi = zenodo_data.get("doi")
+            local_doi = ds_meta_data.dataset_doi
+
+            if zenodo_doi and local_doi:
+                if _doi_version(zenodo_doi) > _doi_version(local_doi):
+                    ds_meta_data.dataset_doi = zenodo_doi
+                    dirty = True
+            elif zenodo_doi and not local_doi:
+                ds_meta_data.dataset_doi = zenodo_doi
+                dirty = True
+
+            # Solo abrir una transacción de escritura si algo cambió
+            if dirty:
+                db.session.commit()
+                logger.info("Metadata synced successfully from Zenodo")
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to sync metadata from Zenodo: {str(e)}")
+
+
+def _zenodo_sync_due(deposition_id: int) -> bool:
+    """Indica si toca sincronizar con Zenodo y, en ese caso, marca la deposition como sincronizada."""
+    now = time.monotonic()
+    # Comprobar y marcar bajo el mismo lock: dos peticiones simultáneas no programan dos sincronizaciones
+    with _zenodo_last_sync_lock:
+        last_sync = _zenodo_last_sync.get(deposition_id)
+        if last_sync is not None and now - last_sync < ZENODO_SYNC_TTL:
+            return False
+        _zenodo_last_sync[deposition_id] = now
+        _zenodo_last_sync.move_to_end(deposition_id)
+        while len(_zenodo_last_sync) > ZENODO_SYNC_CACHE_SIZE:
+            _zenodo_last_sync.popitem(last=False)
+    return True
+
+
+def _record_download(app, user_id, dataset_id: int, download_cookie: str):
+    """Registra la descarga en segundo plano, con su propia sesión de base de datos."""
+    with app.app_context():
+        try:
+            ds_download_record_service.record_download(
+                user_id=user_id, dataset_id=dataset_id, download_cookie=download_cookie
+            )
+        except Exception as exc:
+            db.session.rollback()
+            logger.exception(f"Could not record download of dataset {dataset_id}: {exc}")
+
+
+def _record_view(app, user_id, dataset_id: int, view_cookie: str):
+    """Registra la visita en segundo plano, con su propia sesión de base de datos."""
+    with app.app_context():
+        try:
+            ds_view_record_service.record_view(user_id=user_id, dataset_id=dataset_id, view_cookie=view_cookie)
+        except Exception as exc:
+            db.session.rollback()
+            logger.exception(f"Could not record view of dataset {dataset_id}: {exc}")
+
+
+def _user_temp_folder():
+    """Carpeta temporal del usuario actual, resuelta una sola vez por petición (flask.g)."""
+    if "temp_folder" not in g:
+        g.temp_folder = current_user.temp_folder()
+    return g.temp_folder
+
+
+def _empty_temp_folder(temp_folder):
+    """
+    Deja la carpeta temporal existente y vacía. Lo normal es que ya lo esté (o que tenga unos pocos ficheros
+    sueltos), así que se lista una vez y solo se borra lo que haya, en vez de eliminarla y recrearla siempre.
+    """
+    try:
+        with os.scandir(temp_folder) as it:
+            entries = list(it)
+    except FileNotFoundError:
+        os.makedirs(temp_folder, exist_ok=True)
+        return
+
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
 
 @dataset_bp.route("/dataset/upload", methods=["GET", "POST"])
 @login_required
@@ -45,14 +238,11 @@ def create_dataset():
     form = DataSetForm()
 
     if request.method == "GET":
-        temp_folder = current_user.temp_folder()
-        if os.path.exists(temp_folder):
-            shutil.rmtree(temp_folder)
-        os.makedirs(temp_folder, exist_ok=True)
+        _empty_temp_folder(_user_temp_folder())
 
     if request.method == "POST":
         dataset = None
-        temp_folder = current_user.temp_folder()
+        temp_folder = _user_temp_folder()
 
         try:  # ← Añadir try-finally para SIEMPRE limpiar
             if not form.validate_on_submit():
@@ -73,8 +263,7 @@ def create_dataset():
                 logger.info(f"Publication DOI provided: {dataset.ds_meta_data.publication_doi}. Syncing to Zenodo...")
                 try:
                     zenodo_response_json = zenodo_service.create_new_deposition(dataset)
-                    response_data = json.dumps(zenodo_response_json)
-                    data = json.loads(response_data)
+                    data = zenodo_response_json if isinstance(zenodo_response_json, dict) else {}
                 except Exception as exc:
                     data = {}
                     zenodo_response_json = {}
@@ -86,10 +275,12 @@ def create_dataset():
                     # update dataset with deposition id in Zenodo
                     dataset_service.update_dsmetadata(dataset.ds_meta_data_id, deposition_id=deposition_id)
 
+                    # load feature models and their metadata up front so the upload loop hits no DB
+                    dataset = dataset_service.get_with_feature_models(dataset.id)
+
                     try:
-                        # iterate for each feature model (one feature model = one request to Zenodo)
-                        for feature_model in dataset.feature_models:
-                            zenodo_service.upload_file(dataset, deposition_id, feature_model)
+                        # one feature model = one request to Zenodo; the requests run concurrently
+                        zenodo_service.upload_files(dataset, deposition_id, dataset.feature_models)
 
                         # publish deposition
                         zenodo_service.publish_deposition(deposition_id)
@@ -108,9 +299,8 @@ def create_dataset():
 
         finally:
             # Delete temp folder
-            if os.path.exists(temp_folder) and os.path.isdir(temp_folder):
-                shutil.rmtree(temp_folder)
-                logger.info(f"Cleaned temp folder: {temp_folder}")
+            shutil.rmtree(temp_folder, ignore_errors=True)
+            logger.info(f"Cleaned temp folder: {temp_folder}")
 
     return render_template("dataset/upload_dataset.html", form=form)
 
@@ -125,51 +315,36 @@ def list_dataset():
     )
 
 
-@dataset_bp.route("/dataset/file/upload", methods=["POST"])
-@login_required
-def upload():
+def _store_temp_upload(filename, write_to):
     """
-    Endpoint unificado para subir archivos de cualquier tipo registrado.
-    Valida extensión y contenido según el tipo.
-    Además, evita mezclar archivos GPX y UVL en la misma carpeta temporal.
+    Lógica común a upload() y upload_stream().
+    Valida extensión, evita mezclar archivos GPX y UVL en la misma carpeta temporal,
+    escribe el archivo con `write_to(file_path)` y valida su contenido según el tipo.
     """
-    import os
-
-    from werkzeug.utils import secure_filename
-
-    from app.modules.dataset.registry import (
-        get_allowed_extensions,
-        get_descriptor,
-        infer_kind_from_filename,
-    )
-
-    # 1. Verificar que hay archivo
-    file = request.files.get("file")
-    if not file or not file.filename:
-        return jsonify({"message": "No file provided"}), 400
-
-    # 2. Validar extensión contra tipos registrados
-    allowed_exts = tuple(get_allowed_extensions())
-    filename = file.filename or ""
+    # 1. Validar extensión contra tipos registrados
+    allowed_exts = get_allowed_extensions()
 
-    if not any(filename.lower().endswith(ext) for ext in allowed_exts):
+    if os.path.splitext(filename.lower())[1] not in allowed_exts:
         return (
             jsonify({"message": f"Invalid file type. Allowed: {', '.join(allowed_exts)}"}),
             400,
         )
 
-    # 3. Carpeta temporal del usuario
-    temp_folder = current_user.temp_folder()
+    # 2. Carpeta temporal del usuario
+    temp_folder = _user_temp_folder()
     os.makedirs(temp_folder, exist_ok=True)
 
-    # 3.1 NUEVO: comprobar si ya hay archivos y su tipo
-    existing_files = [f for f in os.listdir(temp_folder) if any(f.lower().endswith(ext) for ext in allowed_exts)]
+    # 2.1 Comprobar el tipo de los archivos ya subidos (guardado en .kind por la primera subida)
+    kind_path = os.path.join(temp_folder, TEMP_KIND_FILENAME)
+    try:
+        with open(kind_path) as f:
+            first_file_kind = f.read().strip()
+    except FileNotFoundError:
+        first_file_kind = None
 
     new_file_kind = infer_kind_from_filename(filename)
 
-    if existing_files:
-        # Tomamos el primero como referencia del tipo actual del dataset
-        first_file_kind = infer_kind_from_filename(existing_files[0])
+    if first_file_kind:
         if first_file_kind != new_file_kind:
             return (
                 jsonify(
@@ -184,12 +359,12 @@ def upload():
                 400,
             )
 
-    # 4. Guardar en carpeta temporal del usuario
+    # 3. Guardar en carpeta temporal del usuario
     new_filename = secure_filename(filename)
     file_path = os.path.join(temp_folder, new_filename)
-    file.save(file_path)
+    write_to(file_path)
 
-    # 5. Inferir tipo y validar contenido
+    # 4. Inferir tipo y validar contenido
     kind = infer_kind_from_filename(new_filename)
     descriptor = get_descriptor(kind)
 
@@ -203,7 +378,11 @@ def upload():
         logger.error(f"Validation failed for {new_filename}: {e}")
         return jsonify({"message": f"Validation failed: {str(e)}"}), 400
 
-    # 6. Respuesta exitosa
+    if not first_file_kind:
+        with open(kind_path, "w") as f:
+            f.write(kind)
+
+    # 5. Respuesta exitosa
     return (
         jsonify(
             {
@@ -216,15 +395,78 @@ def upload():
     )
 
 
+@dataset_bp.route("/dataset/file/upload", methods=["POST"])
+@login_required
+def upload():
+    """
+    Endpoint unificado para subir archivos de cualquier tipo registrado (multipart/form-data).
+    Valida extensión y contenido según el tipo.
+    Además, evita mezclar archivos GPX y UVL en la misma carpeta temporal.
+    """
+    # Volcar la parte "file" del multipart directamente a disco mientras se parsea,
+    # sin pasar por request.files (Werkzeug bufferizaría el cuerpo completo)
+    temp_folder = _user_temp_folder()
+    os.makedirs(temp_folder, exist_ok=True)
+    part_path = os.path.join(temp_folder, f".upload-{uuid.uuid4().hex}.part")
+
+    target = FileTarget(part_path)
+    try:
+        parser = StreamingFormDataParser(headers=request.headers)
+        parser.register("file", target)
+        while True:
+            chunk = request.stream.read(UPLOAD_STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.data_received(chunk)
+
+        if not target.multipart_filename or not os.path.exists(part_path):
+            return jsonify({"message": "No file provided"}), 400
+
+        return _store_temp_upload(target.multipart_filename, lambda file_path: os.replace(part_path, file_path))
+    except ParseFailedException as e:
+        return jsonify({"message": f"Invalid multipart body: {e}"}), 400
+    finally:
+        # Si la subida se rechazó antes de renombrarlo, el fichero parcial sobra
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+
+@dataset_bp.route("/dataset/file/upload_stream", methods=["POST"])
+@login_required
+def upload_stream():
+    """
+    Variante de upload() para ficheros grandes: el cuerpo de la petición es el propio
+    fichero (application/octet-stream) y el nombre llega en la cabecera X-Filename.
+    Se copia request.stream a disco por bloques, sin pasar por el parser multipart de Werkzeug.
+    """
+    filename = request.headers.get("X-Filename", "")
+    if not filename:
+        return jsonify({"message": "No file provided"}), 400
+
+    def write_to(file_path):
+        with open(file_path, "wb") as f:
+            shutil.copyfileobj(request.stream, f, length=UPLOAD_COPY_BUFFER_SIZE)
+
+    return _store_temp_upload(filename, write_to)
+
+
 @dataset_bp.route("/dataset/file/delete", methods=["POST"])
 def delete():
     data = request.get_json()
     filename = data.get("file")
-    temp_folder = current_user.temp_folder()
+    temp_folder = _user_temp_folder()
     filepath = os.path.join(temp_folder, filename)
 
     if os.path.exists(filepath):
         os.remove(filepath)
+
+        # Si ya no quedan archivos, la carpeta vuelve a aceptar cualquier tipo
+        allowed_exts = get_allowed_extensions()
+        if not any(os.path.splitext(f.lower())[1] in allowed_exts for f in os.listdir(temp_folder)):
+            kind_path = os.path.join(temp_folder, TEMP_KIND_FILENAME)
+            if os.path.exists(kind_path):
+                os.remove(kind_path)
+
         return jsonify({"message": "File deleted successfully"})
 
     return jsonify({"error": "Error: File not found"})
@@ -232,61 +474,70 @@ def delete():
 
 @dataset_bp.route("/dataset/download/<int:dataset_id>", methods=["GET"])
 def download_dataset(dataset_id):
-    dataset = dataset_service.get_or_404(dataset_id)
+    """
+    Descarga el dataset como ZIP.
 
-    file_path = f"uploads/user_{dataset.user_id}/dataset_{dataset.id}/"
+    Por defecto (?compress=0) los ficheros van sin comprimir (ZIP_STORED): es lo más rápido de generar
+    y lo recomendable para clientes que solo quieren los bytes. Con ?compress=1 se usa DEFLATE.
+    """
+    dataset = dataset_service.get_or_404(dataset_id)
+    compress = request.args.get("compress", default=0, type=int) == 1
 
-    temp_dir = tempfile.mkdtemp()
-    zip_path = os.path.join(temp_dir, f"dataset_{dataset_id}.zip")
+    zip_path = dataset_service.get_cached_dataset_zip(dataset, compress)
+    zip_name = f"dataset_{dataset_id}.zip"
 
-    with ZipFile(zip_path, "w") as zipf:
-        for subdir, dirs, files in os.walk(file_path):
-            for file in files:
-                full_path = os.path.join(subdir, file)
+    if zip_path is None:
+        # Primera descarga de esta versión: el ZIP se envía según se construye (y queda cacheado)
+        resp = Response(
+            stream_with_context(dataset_service.stream_dataset_zip(dataset, compress)),
+            mimetype="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="{zip_name}"'},
+        )
+    elif accel_prefix := current_app.config.get("DOWNLOAD_ACCEL_REDIRECT_PREFIX"):
+        # nginx sirve el ZIP con sendfile(2); la aplicación solo devuelve las cabeceras
+        resp = make_response("")
+        resp.last_modified = os.path.getmtime(zip_path)
+        resp.headers["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/cache/{os.path.basename(zip_path)}"
+        resp.headers["Content-Type"] = "application/zip"
+        resp.headers["Content-Disposition"] = f'attachment; filename="{zip_name}"'
+        resp.set_etag(dataset_service.get_dataset_zip_etag(zip_path))
+        resp = resp.make_conditional(request)
+        if resp.status_code == 304:
+            # Sin redirección interna: nginx devolvería el ZIP completo en lugar del 304
+            del resp.headers["X-Accel-Redirect"]
+    else:
+        # send_file responde a Range / If-None-Match / If-Modified-Since y entrega el fichero por
+        # wsgi.file_wrapper, que el servidor WSGI puede servir con sendfile(2)
+        resp = make_response(
+            send_file(
+                zip_path,
+                as_attachment=True,
+                download_name=zip_name,
+                mimetype="application/zip",
+                conditional=True,
+                etag=dataset_service.get_dataset_zip_etag(zip_path),
+                last_modified=os.path.getmtime(zip_path),
+            )
+        )
 
-                relative_path = os.path.relpath(full_path, file_path)
-
-                zipf.write(
-                    full_path,
-                    arcname=os.path.join(os.path.basename(zip_path[:-4]), relative_path),
-                )
+    # La URL no cambia entre versiones: el cliente revalida siempre y recibe 304 si el ZIP es el mismo.
+    # private: la respuesta puede llevar Set-Cookie (download_cookie) y una caché compartida la repartiría
+    resp.headers["Cache-Control"] = "private, no-cache"
 
     user_cookie = request.cookies.get("download_cookie")
     if not user_cookie:
         user_cookie = str(uuid.uuid4())  # Generate a new unique identifier if it does not exist
         # Save the cookie to the user's browser
-        resp = make_response(
-            send_from_directory(
-                temp_dir,
-                f"dataset_{dataset_id}.zip",
-                as_attachment=True,
-                mimetype="application/zip",
-            )
-        )
         resp.set_cookie("download_cookie", user_cookie)
-    else:
-        resp = send_from_directory(
-            temp_dir,
-            f"dataset_{dataset_id}.zip",
-            as_attachment=True,
-            mimetype="application/zip",
-        )
 
-    # Check if the download record already exists for this cookie
-    existing_record = DSDownloadRecord.query.filter_by(
-        user_id=current_user.id if current_user.is_authenticated else None,
-        dataset_id=dataset_id,
-        download_cookie=user_cookie,
-    ).first()
-
-    if not existing_record:
-        # Record the download in your database
-        DSDownloadRecordService().create(
-            user_id=current_user.id if current_user.is_authenticated else None,
-            dataset_id=dataset_id,
-            download_date=datetime.now(timezone.utc),
-            download_cookie=user_cookie,
-        )
+    # Record the download unless this cookie already downloaded it, off the response path
+    _record_executor.submit(
+        _record_download,
+        current_app._get_current_object(),
+        current_user.id if current_user.is_authenticated else None,
+        dataset_id,
+        user_cookie,
+    )
 
     return resp
 
@@ -299,59 +550,29 @@ def subdomain_index(doi):
     if new_doi:
         return redirect(url_for("dataset.subdomain_index", doi=new_doi), code=302)
 
-    # Try to search the dataset by the provided DOI
-    ds_meta_data = dsmetadata_service.filter_by_doi(doi)
+    # Try to search the dataset by the provided DOI (with everything the template renders, no N+1)
+    dataset = dataset_service.get_by_doi_with_details(doi)
 
-    if not ds_meta_data:
+    if not dataset:
         abort(404)
 
-    # Get dataset
-    dataset = ds_meta_data.data_set
-
-    # Sincronizar metadatos desde Zenodo/Fakenodo antes de mostrar
-    if dataset.ds_meta_data.deposition_id:
-        try:
-            logger.info(f"Syncing metadata from Zenodo for dataset {dataset.id}")
-            zenodo_data = zenodo_service.get_deposition(dataset.ds_meta_data.deposition_id)
-
-            if zenodo_data and "metadata" in zenodo_data:
-                metadata = zenodo_data["metadata"]
-
-                # Actualizar título si cambió
-                if metadata.get("title") and metadata["title"] != dataset.ds_meta_data.title:
-                    dataset.ds_meta_data.title = metadata["title"]
-
-                # Actualizar descripción si cambió
-                if metadata.get("description") and metadata["description"] != dataset.ds_meta_data.description:
-                    dataset.ds_meta_data.description = metadata["description"]
-
-                # Actualizar tags si cambiaron
-                if metadata.get("keywords"):
-                    zenodo_tags = [t for t in metadata["keywords"] if t.lower() != "uvlhub"]
-                    new_tags = ", ".join(zenodo_tags)
-                    if new_tags != (dataset.ds_meta_data.tags or ""):
-                        dataset.ds_meta_data.tags = new_tags
-
-                # NO actualizar el DOI desde Zenodo si ya tenemos uno más reciente
-                zenodo_doi = zenodo_data.get("doi")
-                local_doi = dataset.ds_meta_data.dataset_doi
-
-                if zenodo_doi and local_doi:
-                    zenodo_version = int(zenodo_doi.split(".v")[-1]) if ".v" in zenodo_doi else 1
-                    local_version = int(local_doi.split(".v")[-1]) if ".v" in local_doi else 1
-
-                    if zenodo_version > local_version:
-                        dataset.ds_meta_data.dataset_doi = zenodo_doi
-                elif zenodo_doi and not local_doi:
-                    dataset.ds_meta_data.dataset_doi = zenodo_doi
-
-                db.session.commit()
-                logger.info("Metadata synced successfully from Zenodo")
-        except Exception as e:
-            logger.error(f"Failed to sync metadata from Zenodo: {str(e)}")
+    # Sincronizar metadatos desde Zenodo/Fakenodo en segundo plano (como mucho una vez cada TTL).
+    # La página se renderiza con los metadatos locales sin esperar a Zenodo.
+    deposition_id = dataset.ds_meta_data.deposition_id
+    if deposition_id and _zenodo_sync_due(deposition_id):
+        _zenodo_sync_executor.submit(
+            _sync_zenodo_metadata, current_app._get_current_object(), dataset.ds_meta_data_id, deposition_id
+        )
 
-    # Save the cookie to the user's browser
-    user_cookie = ds_view_record_service.create_cookie(dataset=dataset)
+    # Record the view unless this cookie already viewed it, off the response path
+    user_cookie = request.cookies.get("view_cookie") or str(uuid.uuid4())
+    _record_executor.submit(
+        _record_view,
+        current_app._get_current_object(),
+        current_user.id if current_user.is_authenticated else None,
+        dataset.id,
+        user_cookie,
+    )
     related = recommendation_service.get_related_datasets(dataset, limit=6)
 
     resp = make_response(
@@ -382,7 +603,7 @@ def get_unsynchronized_dataset(dataset_id):
         "dataset/view_dataset.html",
         dataset=dataset,
         related_datasets=related,
-        FLASK_ENV=os.getenv("FLASK_ENV", "development"),
+        FLASK_ENV=FLASK_ENV,
     )
 
 
@@ -390,7 +611,8 @@ def get_unsynchronized_dataset(dataset_id):
 def related_datasets_api(dataset_id):
     dataset = dataset_service.get_or_404(dataset_id)
     related = recommendation_service.get_related_datasets(dataset, limit=6)
-    return jsonify(
+    # ds_meta_data viene precargado por el repositorio de recomendaciones: no hay consultas extra aquí
+    return json_response(
         [
             {
                 "id": d.id,
@@ -403,41 +625,49 @@ def related_datasets_api(dataset_id):
     )
 
 
-@dataset_bp.route("/api/gpx/<int:file_id>")
-def get_gpx_data(file_id):
-    """Retorna datos parseados de un archivo GPX."""
-    import logging
-    import os
+_GPX_LOOKUP_SQL = text(
+    """
+    SELECT
+        ds.user_id,
+        ds.id as dataset_id,
+        dsm.dataset_doi,
+        f.id as file_id,
+        f.name as file_name
+    FROM feature_model fm
+    JOIN data_set ds ON fm.data_set_id = ds.id
+    LEFT JOIN ds_meta_data dsm ON ds.ds_meta_data_id = dsm.id
+    LEFT JOIN file f ON f.feature_model_id = fm.id
+    WHERE fm.fm_meta_data_id = :file_id
+    LIMIT 1
+    """
+).columns(
+    column("user_id", Integer),
+    column("dataset_id", Integer),
+    column("dataset_doi", String),
+    column("file_id", Integer),
+    column("file_name", String),
+)
 
-    from flask import current_app, jsonify
 
-    from app.modules.dataset.handlers.gpx_handler import GPXHandler
+def _lookup_gpx_file(file_id: int):
+    """(user_id, dataset_id, dataset_doi, file_id, file_name) del fichero, o None."""
+    # Siempre contra la BD: dueño y DOI deciden los permisos y no pueden quedarse obsoletos
+    return db.session.execute(_GPX_LOOKUP_SQL, {"file_id": file_id}).first()
 
-    logger = logging.getLogger(__name__)
 
-    try:
-        from app import db
+@lru_cache(maxsize=GPX_PAYLOAD_CACHE_SIZE)
+def _gpx_payload(file_path: str, mtime_ns: int, size: int):
+    """GPX parseado y ya codificado a JSON. mtime y tamaño forman parte de la clave, así que se invalida solo."""
+    gpx_data = GPXHandler().parse_gpx(file_path)
+    return None if gpx_data is None else encode_json(gpx_data)
+
 
+@dataset_bp.route("/api/gpx/<int:file_id>")
+def get_gpx_data(file_id):
+    """Retorna datos parseados de un archivo GPX."""
+    try:
         # Obtener todo en una query
-        result = db.session.execute(
-            db.text(
-                """
-                SELECT
-                    ds.user_id,
-                    ds.id as dataset_id,
-                    dsm.dataset_doi,
-                    f.id as file_id,
-                    f.name as file_name
-                FROM feature_model fm
-                JOIN data_set ds ON fm.data_set_id = ds.id
-                LEFT JOIN ds_meta_data dsm ON ds.ds_meta_data_id = dsm.id
-                LEFT JOIN file f ON f.feature_model_id = fm.id
-                WHERE fm.fm_meta_data_id = :file_id
-                LIMIT 1
-            """
-            ),
-            {"file_id": file_id},
-        ).first()
+        result = _lookup_gpx_file(file_id)
 
         if not result:
             return jsonify({"error": "File not found"}), 404
@@ -453,25 +683,22 @@ def get_gpx_data(file_id):
             if not current_user.is_authenticated or user_id != current_user.id:
                 return jsonify({"error": "Unauthorized"}), 403
 
-        # ✅ Construir la ruta desde el directorio raíz del proyecto (sin /app)
-        # current_app.root_path = /path/to/project/app
-        # Necesitamos: /path/to/project/uploads
-        project_root = os.path.dirname(current_app.root_path)
-
-        file_path = os.path.join(project_root, "uploads", f"user_{user_id}", f"dataset_{dataset_id}", gpx_file_name)
+        # ✅ Ruta desde el directorio raíz del proyecto (sin /app), ver _init_upload_root
+        file_path = f"{_UPLOAD_ROOT}/user_{user_id}/dataset_{dataset_id}/{gpx_file_name}"
 
-        if not os.path.exists(file_path):
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
             logger.error(f"File not found at: {file_path}")
             return jsonify({"error": "File not found on disk"}), 404
 
-        # Parsear el GPX
-        handler = GPXHandler()
-        gpx_data = handler.parse_gpx(file_path)
+        # Parsear el GPX (o reutilizar el resultado ya serializado si el fichero no ha cambiado)
+        payload = _gpx_payload(file_path, st.st_mtime_ns, st.st_size)
 
-        if gpx_data is None:
+        if payload is None:
             return jsonify({"error": "Invalid GPX file"}), 500
 
-        return jsonify(gpx_data)
+        return json_response(payload)
 
     except Exception as e:
         logger.error(f"Error parsing GPX {file_id}: {str(e)}")
@@ -482,7 +709,9 @@ def get_gpx_data(file_id):
 @login_required
 def edit_dataset(dataset_id):
     """Editar un dataset (synchronized o unsynchronized)"""
-    dataset = BaseDataset.query.get_or_404(dataset_id)
+    dataset = dataset_service.get_with_details(dataset_id)
+    if dataset is None:
+        abort(404)
 
     # Solo el propietario puede editar
     if dataset.user_id != current_user.id:
@@ -514,10 +743,11 @@ def edit_dataset(dataset_id):
         # 4. Subir nuevos archivos
         uploaded_files = request.files.getlist("files")
         if uploaded_files and uploaded_files[0].filename:
-            from werkzeug.utils import secure_filename
-
-            from app.modules.dataset.registry import get_descriptor, infer_kind_from_filename
+            dest_dir = os.path.join(WORKING_DIR, "uploads", f"user_{current_user.id}", f"dataset_{dataset.id}")
+            os.makedirs(dest_dir, exist_ok=True)
 
+            # Las filas nuevas se añaden juntas a la sesión y se insertan en un único flush al hacer commit
+            new_feature_models = []
             for file in uploaded_files:
                 if not file.filename:
                     continue
@@ -535,12 +765,8 @@ def edit_dataset(dataset_id):
                     continue
 
                 # Guardar archivo
-                working_dir = os.getenv("WORKING_DIR", "")
-                dest_dir = os.path.join(working_dir, "uploads", f"user_{current_user.id}", f"dataset_{dataset.id}")
-                os.makedirs(dest_dir, exist_ok=True)
-
                 file_path = os.path.join(dest_dir, filename)
-                file.save(file_path)
+                checksum, size = save_uploaded_file_with_checksum(file, file_path)
 
                 # Validar archivo
                 descriptor = get_descriptor(file_kind)
@@ -553,30 +779,26 @@ def edit_dataset(dataset_id):
                     continue
 
                 # Crear FMMetaData con publication_type obligatorio
-                from app.modules.featuremodel.repositories import FeatureModelRepository, FMMetaDataRepository
-                from app.modules.hubfile.repositories import HubfileRepository
-
-                fmmetadata = FMMetaDataRepository().create(
-                    commit=False,
+                fmmetadata = FMMetaData(
                     filename=filename,
                     title=filename,
                     description="Added via edit",
                     publication_type="none",
                 )
 
-                fm = FeatureModelRepository().create(
-                    commit=False, data_set_id=dataset.id, fm_meta_data_id=fmmetadata.id
-                )
-
-                checksum, size = calculate_checksum_and_size(file_path)
-
-                HubfileRepository().create(
-                    commit=False, name=filename, checksum=checksum, size=size, feature_model_id=fm.id
+                new_feature_models.append(
+                    FeatureModel(
+                        data_set_id=dataset.id,
+                        fm_meta_data=fmmetadata,
+                        files=[Hubfile(name=filename, checksum=checksum, size=size)],
+                    )
                 )
 
                 changes.append(f"Added file: {filename}")
 
-                # Guardar cambios
+            db.session.add_all(new_feature_models)
+
+        # Guardar cambios
         if changes:
             try:
                 db.session.commit()
@@ -1,9 +1,8 @@
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
-from dotenv import load_dotenv
-
 from app.modules.auth.models import User
 from app.modules.dataset.models import Author, DSMetaData, DSMetrics, GPXDataset, PublicationType, UVLDataset
 from app.modules.featuremodel.models import FeatureModel, FMMetaData
@@ -11,24 +10,78 @@ from app.modules.hubfile.models import Hubfile
 from app.modules.versioning.services import VersionService
 from core.seeders.BaseSeeder import BaseSeeder
 
+# app/__init__.py already loads .env before any seeder module is imported
+WORKING_DIR = os.getenv("WORKING_DIR", "")
+UPLOADS_ROOT = os.path.join(WORKING_DIR, "uploads")
+UVL_EXAMPLES_FOLDER = os.path.join(WORKING_DIR, "app", "modules", "dataset", "uvl_examples")
+
+# Seeded GPX track, already encoded: only the track and dataset numbers change per file
+GPX_TEMPLATE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<gpx version="1.1" creator="UVLHub Seeder">
+  <trk>
+    <name>Sample Track %d - Dataset %d</name>
+    <trkseg>
+      <trkpt lat="37.389092" lon="-5.984459"><ele>10</ele></trkpt>
+      <trkpt lat="37.389192" lon="-5.984559"><ele>12</ele></trkpt>
+      <trkpt lat="37.389292" lon="-5.984659"><ele>15</ele></trkpt>
+    </trkseg>
+  </trk>
+</gpx>"""
+
+
+# Threads used to copy the UVL examples into the uploads folder
+SEED_COPY_WORKERS = 4
+
+
+def _copy_uvl_example(file_name, file_path):
+    """Copy one UVL example to `file_path` and return its size."""
+    # copyfile to the final path: no chmod afterwards, and Linux copies in-kernel (sendfile)
+    shutil.copyfile(os.path.join(UVL_EXAMPLES_FOLDER, file_name), file_path)
+    return os.path.getsize(file_path)
+
 
 class DataSetSeeder(BaseSeeder):
 
     priority = 2
 
     def run(self):
-        # Retrieve users
-        user1 = User.query.filter_by(email="user1@example.com").first()
-        user2 = User.query.filter_by(email="user2@example.com").first()
-        user3 = User.query.filter_by(email="user3@example.com").first()
-        user4 = User.query.filter_by(email="user4@example.com").first()
+        # Retrieve users (one query for the four of them)
+        emails = [f"user{i}@example.com" for i in range(1, 5)]
+        users_by_email = {user.email: user for user in User.query.filter(User.email.in_(emails)).all()}
+        user1, user2, user3, user4 = (users_by_email.get(email) for email in emails)
 
         if not user1 or not user2 or not user3 or not user4:
             raise Exception("Users not found. Please seed users first.")
 
+        # All rows are only flushed by seed(commit=False) and committed together: one transaction
+        try:
+            seeded_datasets = self._seed_datasets(user1, user2, user3, user4)
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+
+        # Create versions AFTER all files exist; they are inserted together with a single commit
+        users_by_id = {user.id: user for user in (user1, user2, user3, user4)}
+        try:
+            for dataset in seeded_datasets:
+                user = users_by_id[dataset.user_id]
+                VersionService.create_version(
+                    dataset=dataset, changelog="Initial release", user=user, bump_type="major", commit=False
+                )
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+
+    def _seed_datasets(self, user1, user2, user3, user4):
+        """Seed metadata, datasets, feature models and files without committing; returns the datasets."""
+        # All seeded datasets share one creation timestamp
+        now = datetime.now(timezone.utc)
+
         # Create DSMetrics instance
         ds_metrics = DSMetrics(number_of_models="5", number_of_features="50")
-        seeded_ds_metrics = self.seed([ds_metrics])[0]
+        seeded_ds_metrics = self.seed([ds_metrics], commit=False)[0]
 
         # Create DSMetaData instances: 4 UVL (user1 y user2) + 4 GPX (user3 y user4)
         ds_meta_data_list = [
@@ -117,7 +170,7 @@ class DataSetSeeder(BaseSeeder):
                 ds_metrics_id=seeded_ds_metrics.id,
             ),
         ]
-        seeded_ds_meta_data = self.seed(ds_meta_data_list)
+        seeded_ds_meta_data = self.seed(ds_meta_data_list, commit=False)
 
         # Create Author instances
         authors = [
@@ -129,7 +182,7 @@ class DataSetSeeder(BaseSeeder):
             )
             for i in range(8)
         ]
-        self.seed(authors)
+        self.seed(authors, commit=False)
 
         # Create UVL datasets
         uvl_datasets = [
@@ -137,26 +190,26 @@ class DataSetSeeder(BaseSeeder):
             UVLDataset(
                 user_id=user1.id,
                 ds_meta_data_id=seeded_ds_meta_data[0].id,
-                created_at=datetime.now(timezone.utc),
+                created_at=now,
             ),
             UVLDataset(
                 user_id=user1.id,
                 ds_meta_data_id=seeded_ds_meta_data[1].id,
-                created_at=datetime.now(timezone.utc),
+                created_at=now,
             ),
             # User2 - 2 UVL
             UVLDataset(
                 user_id=user2.id,
                 ds_meta_data_id=seeded_ds_meta_data[2].id,
-                created_at=datetime.now(timezone.utc),
+                created_at=now,
             ),
             UVLDataset(
                 user_id=user2.id,
                 ds_meta_data_id=seeded_ds_meta_data[3].id,
-                created_at=datetime.now(timezone.utc),
+                created_at=now,
             ),
         ]
-        seeded_uvl_datasets = self.seed(uvl_datasets)
+        seeded_uvl_datasets = self.seed(uvl_datasets, commit=False)
 
         # Create GPX datasets
         gpx_datasets = [
@@ -164,26 +217,26 @@ class DataSetSeeder(BaseSeeder):
             GPXDataset(
                 user_id=user3.id,
                 ds_meta_data_id=seeded_ds_meta_data[4].id,
-                created_at=datetime.now(timezone.utc),
+                created_at=now,
             ),
             GPXDataset(
                 user_id=user3.id,
                 ds_meta_data_id=seeded_ds_meta_data[5].id,
-                created_at=datetime.now(timezone.utc),
+                created_at=now,
             ),
             # User4 - 2 GPX
             GPXDataset(
                 user_id=user4.id,
                 ds_meta_data_id=seeded_ds_meta_data[6].id,
-                created_at=datetime.now(timezone.utc),
+                created_at=now,
             ),
             GPXDataset(
                 user_id=user4.id,
                 ds_meta_data_id=seeded_ds_meta_data[7].id,
-                created_at=datetime.now(timezone.utc),
+                created_at=now,
             ),
         ]
-        seeded_gpx_datasets = self.seed(gpx_datasets)
+        seeded_gpx_datasets = self.seed(gpx_datasets, commit=False)
 
         # Combine all datasets
         seeded_datasets = seeded_uvl_datasets + seeded_gpx_datasets
@@ -201,7 +254,24 @@ class DataSetSeeder(BaseSeeder):
             )
             for i in range(12)
         ]
-        seeded_fm_meta_data = self.seed(fm_meta_data_list)
+
+        # Create GPX files metadata (3 files per GPX dataset). UVL and GPX rows share a single
+        # seed() call per table (FMMetaData, FeatureModel, Hubfile) instead of one per file
+        gpx_files = []  # (dataset, dataset_idx, file_idx)
+        for dataset_idx in [4, 5, 6, 7]:
+            for file_idx in range(3):
+                gpx_files.append((seeded_datasets[dataset_idx], dataset_idx, file_idx))
+                fm_meta_data_list.append(
+                    FMMetaData(
+                        filename=f"track{file_idx+1}.gpx",
+                        title=f"GPS Track {file_idx+1}",
+                        description=f"GPS track for dataset {dataset_idx+1}",
+                        publication_type=PublicationType.OTHER,
+                        tags="gpx, gps",
+                        file_version="1.0",
+                    )
+                )
+        seeded_fm_meta_data = self.seed(fm_meta_data_list, commit=False)
 
         # Create Author instances for FMMetaData
         fm_authors = [
@@ -213,90 +283,64 @@ class DataSetSeeder(BaseSeeder):
             )
             for i in range(12)
         ]
-        self.seed(fm_authors)
+        self.seed(fm_authors, commit=False)
 
-        # Create FeatureModels for UVL datasets (3 files per dataset)
+        # Create FeatureModels for UVL datasets (3 files per dataset) and for GPX datasets
         feature_models = [
             FeatureModel(data_set_id=seeded_datasets[i // 3].id, fm_meta_data_id=seeded_fm_meta_data[i].id)
             for i in range(12)
         ]
-        seeded_feature_models = self.seed(feature_models)
-
-        # Copy UVL files to uploads folder
-        load_dotenv()
-        working_dir = os.getenv("WORKING_DIR", "")
-        src_folder = os.path.join(working_dir, "app", "modules", "dataset", "uvl_examples")
+        feature_models += [
+            FeatureModel(data_set_id=dataset.id, fm_meta_data_id=seeded_fm_meta_data[12 + i].id)
+            for i, (dataset, _, _) in enumerate(gpx_files)
+        ]
+        seeded_feature_models = self.seed(feature_models, commit=False)
 
-        for i in range(12):
-            file_name = f"file{i+1}.uvl"
-            feature_model = seeded_feature_models[i]
-            dataset = next(ds for ds in seeded_datasets if ds.id == feature_model.data_set_id)
-            user_id = dataset.user_id
+        hubfiles = []
 
-            dest_folder = os.path.join(working_dir, "uploads", f"user_{user_id}", f"dataset_{dataset.id}")
+        # One uploads folder per dataset, created once
+        dest_folders = {}
+        for dataset in seeded_datasets:
+            dest_folder = os.path.join(UPLOADS_ROOT, f"user_{dataset.user_id}", f"dataset_{dataset.id}")
             os.makedirs(dest_folder, exist_ok=True)
-            shutil.copy(os.path.join(src_folder, file_name), dest_folder)
+            dest_folders[dataset.id] = dest_folder
 
-            file_path = os.path.join(dest_folder, file_name)
+        # Copy UVL files to uploads folder. The copies are independent I/O (the GIL is released),
+        # so they run on a small thread pool; the Hubfile rows are built afterwards, in order
+        uvl_names = [f"file{i+1}.uvl" for i in range(12)]
+        # Same mapping used to build feature_models above: 3 files per UVL dataset
+        uvl_paths = [os.path.join(dest_folders[seeded_datasets[i // 3].id], uvl_names[i]) for i in range(12)]
+        with ThreadPoolExecutor(max_workers=SEED_COPY_WORKERS) as executor:
+            uvl_sizes = list(executor.map(_copy_uvl_example, uvl_names, uvl_paths))
 
-            uvl_file = Hubfile(
-                name=file_name,
-                checksum=f"checksum{i+1}",
-                size=os.path.getsize(file_path),
-                feature_model_id=feature_model.id,
+        for i, (file_name, size) in enumerate(zip(uvl_names, uvl_sizes)):
+            hubfiles.append(
+                Hubfile(
+                    name=file_name,
+                    checksum=f"checksum{i+1}",
+                    size=size,
+                    feature_model_id=seeded_feature_models[i].id,
+                )
             )
-            self.seed([uvl_file])
 
         # Create GPX files (3 files per GPX dataset)
-        for dataset_idx in [4, 5, 6, 7]:
-            dataset = seeded_datasets[dataset_idx]
-            user_id = dataset.user_id
-
-            dest_folder = os.path.join(working_dir, "uploads", f"user_{user_id}", f"dataset_{dataset.id}")
-            os.makedirs(dest_folder, exist_ok=True)
-
-            for file_idx in range(3):
-                file_name = f"track{file_idx+1}.gpx"
-
-                # Create FMMetaData for GPX
-                gpx_fm_meta = FMMetaData(
-                    filename=file_name,
-                    title=f"GPS Track {file_idx+1}",
-                    description=f"GPS track for dataset {dataset_idx+1}",
-                    publication_type=PublicationType.OTHER,
-                    tags="gpx, gps",
-                    file_version="1.0",
-                )
-                seeded_gpx_fm = self.seed([gpx_fm_meta])[0]
-
-                gpx_feature_model = FeatureModel(data_set_id=dataset.id, fm_meta_data_id=seeded_gpx_fm.id)
-                seeded_gpx_feature_model = self.seed([gpx_feature_model])[0]
+        for i, (dataset, dataset_idx, file_idx) in enumerate(gpx_files):
+            file_name = f"track{file_idx+1}.gpx"
 
-                # Create GPX file
-                dest_file = os.path.join(dest_folder, file_name)
-                gpx_content = f"""<?xml version="1.0" encoding="UTF-8"?>
-<gpx version="1.1" creator="UVLHub Seeder">
-  <trk>
-    <name>Sample Track {file_idx+1} - Dataset {dataset_idx+1}</name>
-    <trkseg>
-      <trkpt lat="37.389092" lon="-5.984459"><ele>10</ele></trkpt>
-      <trkpt lat="37.389192" lon="-5.984559"><ele>12</ele></trkpt>
-      <trkpt lat="37.389292" lon="-5.984659"><ele>15</ele></trkpt>
-    </trkseg>
-  </trk>
-</gpx>"""
-                with open(dest_file, "w") as f:
-                    f.write(gpx_content)
+            # Create GPX file
+            dest_file = os.path.join(dest_folders[dataset.id], file_name)
+            with open(dest_file, "wb") as f:
+                f.write(GPX_TEMPLATE % (file_idx + 1, dataset_idx + 1))
 
-                gpx_file = Hubfile(
+            hubfiles.append(
+                Hubfile(
                     name=file_name,
                     checksum=f"gpx_checksum_{dataset_idx}_{file_idx}",
                     size=os.path.getsize(dest_file),
-                    feature_model_id=seeded_gpx_feature_model.id,
+                    feature_model_id=seeded_feature_models[12 + i].id,
                 )
-                self.seed([gpx_file])
+            )
 
-        # Create versions AFTER all files exist
-        for dataset in seeded_datasets:
-            user = User.query.get(dataset.user_id)
-            VersionService.create_version(dataset=dataset, changelog="Initial release", user=user, bump_type="major")
+        self.seed(hubfiles, commit=False)
+
+        return seeded_datasets
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import errno
 import hashlib
+import io
 import logging
 import os
 import shutil
+import tempfile
 import uuid
 import xml.etree.ElementTree as ET
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterator, Optional
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
 
 from flask import request
+from flask_login import current_user
 
 from app.modules.auth.services import AuthenticationService
 from app.modules.dataset.models import BaseDataset, DSMetaData
@@ -21,7 +28,9 @@ from app.modules.dataset.repositories import (
     DSMetaDataRepository,
     DSViewRecordRepository,
 )
+from app.modules.featuremodel.models import FeatureModel, FMMetaData
 from app.modules.featuremodel.repositories import FeatureModelRepository, FMMetaDataRepository
+from app.modules.hubfile.models import Hubfile
 from app.modules.hubfile.repositories import (
     HubfileDownloadRecordRepository,
     HubfileRepository,
@@ -35,13 +44,183 @@ from core.services.BaseService import BaseService
 
 logger = logging.getLogger(__name__)
 
+# ZIPs de descarga ya generados (uno por dataset y versión), dentro de uploads/ para que nginx pueda servirlos
+DATASET_ZIP_CACHE_DIR = os.path.join("uploads", "cache")
+ZIP_STREAM_CHUNK_SIZE = 1 << 16
+# Zip64 solo hace falta pasados 2 GiB o 65535 entradas; se deja margen para cabeceras y directorio central
+ZIP64_SIZE_THRESHOLD = 1 << 30
+ZIP64_FILE_COUNT_LIMIT = 0xFFFF
+
+
+@lru_cache(maxsize=1)
+def _uvlhub_doi_prefix() -> str:
+    """Prefijo de las URLs DOI públicas; DOMAIN se lee una sola vez por proceso."""
+    return f"http://{os.getenv('DOMAIN', 'localhost')}/doi/"
+
+
+def build_uvlhub_doi(dataset_doi: Optional[str]) -> str:
+    # f-string como antes: un dataset sin sincronizar (DOI None) sigue generando URL en vez de fallar
+    return f"{_uvlhub_doi_prefix()}{dataset_doi}"
+
+
+@lru_cache(maxsize=256)
+def _zip_digest(zip_path: str, mtime_ns: int, size: int) -> str:
+    """Hash del contenido del ZIP; mtime y tamaño forman parte de la clave para invalidar la caché."""
+    with open(zip_path, "rb") as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+
+class _ZipStreamSink(io.RawIOBase):
+    """Destino no seekable para ZipFile: guarda lo escrito hasta el siguiente drain() y lo copia a `tee`."""
+
+    def __init__(self, tee):
+        self._tee = tee
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        data = bytes(b)
+        self._tee.write(data)
+        self._chunks.append(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def _iter_files(root: str) -> Iterator[os.DirEntry]:
+    """Recorre `root` recursivamente con os.scandir y devuelve sus ficheros, sin el stat extra de os.walk."""
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        yield entry
+        except FileNotFoundError:
+            # Igual que os.walk: un directorio inexistente no tiene ficheros
+            continue
+
+
+def _needs_zip64(total_size: int, file_count: int) -> bool:
+    """Indica si un ZIP con `file_count` ficheros que suman `total_size` bytes necesita extensiones Zip64."""
+    return total_size > ZIP64_SIZE_THRESHOLD or file_count > ZIP64_FILE_COUNT_LIMIT
+
+
+def _zip_cache_key(zip_path: str) -> str:
+    """Nombre del ZIP sin extensión ni sufijo de modo: lo comparten la variante STORED y la DEFLATE."""
+    return os.path.basename(zip_path).removesuffix(".zip").removesuffix("_deflated")
+
+
+def _prune_zip_cache(zip_path: str, stale_prefix: str):
+    """Borra los ZIP de la caché que empiezan por `stale_prefix` y no corresponden al contenido de `zip_path`."""
+    cache_dir = os.path.dirname(zip_path)
+    current_key = _zip_cache_key(zip_path)
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.name.startswith(stale_prefix) and entry.name.endswith(".zip"):
+                if _zip_cache_key(entry.name) != current_key:
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        # Otra petición ya lo borró
+                        pass
+
+
+def _stream_zip(
+    entries, zip_path: str, compress: bool = False, allow_zip64: bool = True, stale_prefix: Optional[str] = None
+) -> Iterator[bytes]:
+    """
+    Escribe los ficheros `entries` ((ruta, nombre en el ZIP)) como ZIP y va cediendo los bytes generados.
+    Al terminar, el ZIP completo queda en `zip_path`; si el cliente corta la descarga no se guarda nada.
+    Sin `allow_zip64` no se escriben registros Zip64 en las cabeceras ni en el directorio central.
+    Con `stale_prefix`, tras guardar el ZIP se borran los de la caché con ese prefijo y otro contenido.
+
+    Con `compress` se usa DEFLATE con el nivel por defecto de zlib: en Python < 3.13 el nivel de una entrada
+    creada con ZipInfo solo se puede fijar con el atributo privado `_compresslevel`, así que no se ajusta.
+    """
+    cache_dir = os.path.dirname(zip_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".part")
+
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            sink = _ZipStreamSink(tmp_file)
+            compression = ZIP_DEFLATED if compress else ZIP_STORED
+            with ZipFile(sink, "w", compression=compression, allowZip64=allow_zip64) as zipf:
+                for full_path, arcname in entries:
+                    # from_file() conserva mtime y permisos del fichero, pero no hereda la compresión del ZipFile
+                    zinfo = ZipInfo.from_file(full_path, arcname)
+                    zinfo.compress_type = zipf.compression
+                    force_zip64 = allow_zip64 and zinfo.file_size > ZIP64_SIZE_THRESHOLD
+                    with open(full_path, "rb") as src, zipf.open(zinfo, "w", force_zip64=force_zip64) as dst:
+                        while chunk := src.read(ZIP_STREAM_CHUNK_SIZE):
+                            dst.write(chunk)
+                            data = sink.drain()
+                            if data:
+                                yield data
+            # Cabeceras finales y directorio central
+            yield sink.drain()
+        os.replace(tmp_path, zip_path)
+        if stale_prefix:
+            _prune_zip_cache(zip_path, stale_prefix)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _new_checksum_hasher():
+    """
+    Hash de contenido de los Hubfile: BLAKE2b de 128 bits (32 caracteres hex, como el MD5 que se usaba antes).
+    El checksum solo identifica el contenido; no se compara con valores calculados fuera de la aplicación.
+    """
+    return hashlib.blake2b(digest_size=16)
+
+
+# Hilos para validar y hashear en paralelo los ficheros de un dataset nuevo (trabajo de E/S: no hace falta más)
+FILE_CHECK_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def _validate_and_checksum(handler, file_path: str):
+    """Valida el fichero con el `handler` de su tipo y devuelve (checksum, tamaño). Corre en hilos: no toca la BD."""
+    hasher = _new_checksum_hasher()
+    size = handler.validate_and_checksum(file_path, hasher)
+    return hasher.hexdigest(), size
+
 
 def calculate_checksum_and_size(file_path):
-    file_size = os.path.getsize(file_path)
+    """Checksum y tamaño de un fichero, leyéndolo por bloques (la memoria no crece con el tamaño del fichero)."""
     with open(file_path, "rb") as file:
-        content = file.read()
-        hash_md5 = hashlib.md5(content).hexdigest()
-        return hash_md5, file_size
+        file_size = os.fstat(file.fileno()).st_size
+        checksum = hashlib.file_digest(file, _new_checksum_hasher).hexdigest()
+        return checksum, file_size
+
+
+UPLOAD_COPY_BUFFER_SIZE = 1 << 20  # 1 MiB (Werkzeug usa 16 KiB por defecto)
+
+
+def save_uploaded_file_with_checksum(file, file_path):
+    """
+    Guarda un FileStorage de Werkzeug en disco y devuelve (checksum, tamaño), calculados
+    sobre los mismos bloques que se escriben: no hace falta releer el fichero después.
+    """
+    stream = file.stream
+    stream.seek(0)
+    hasher = _new_checksum_hasher()
+    size = 0
+
+    with open(file_path, "wb") as dst:
+        while chunk := stream.read(UPLOAD_COPY_BUFFER_SIZE):
+            hasher.update(chunk)
+            dst.write(chunk)
+            size += len(chunk)
+
+    return hasher.hexdigest(), size
 
 
 # === Tipos de dataset (validación por extensión) ===
@@ -63,13 +242,13 @@ class GPXHandler(DataTypeHandler):
     name = "gpx"
 
     def validate(self, filepath: str):
-        # Validación mínima: XML válido y raíz <gpx>
+        # Validación mínima: raíz <gpx>. Solo se lee hasta la etiqueta raíz, sin construir el árbol
         with open(filepath, "rb") as f:
-            tree = ET.parse(f)
-        root = tree.getroot()
-        if not root.tag.lower().endswith("gpx"):
-            raise ValueError("Invalid GPX file: missing <gpx> root")
-        return True
+            for _, elem in ET.iterparse(f, events=("start",)):
+                if not elem.tag.lower().rsplit("}", 1)[-1].endswith("gpx"):
+                    raise ValueError("Invalid GPX file: missing <gpx> root")
+                return True
+        raise ValueError("Invalid GPX file: missing <gpx> root")
 
 
 DATA_TYPE_REGISTRY = {
@@ -99,14 +278,77 @@ class DataSetService(BaseService):
         dest_dir = os.path.join(working_dir, "uploads", f"user_{current_user.id}", f"dataset_{dataset.id}")
         os.makedirs(dest_dir, exist_ok=True)
 
+        # Feature models y sus metadatos en dos consultas, en vez de un lazy load de fm_meta_data por fichero
+        dataset = self.repository.get_with_feature_models(dataset.id) or dataset
+
         for feature_model in dataset.feature_models:
             filename = feature_model.fm_meta_data.filename
             source_path = os.path.join(source_dir, filename)
+            dest_path = os.path.join(dest_dir, filename)
 
-            if os.path.exists(source_path):
-                shutil.move(source_path, dest_dir)
-            else:
+            # La carpeta temporal cuelga de uploads/, así que normalmente basta con renombrar
+            try:
+                os.replace(source_path, dest_path)
+            except FileNotFoundError:
                 logger.warning(f"File not found: {source_path}")
+            except OSError as exc:
+                if exc.errno != errno.EXDEV:
+                    raise
+                shutil.move(source_path, dest_path)
+
+    @staticmethod
+    def _scan_dataset_files(dataset: BaseDataset) -> list:
+        """(ruta, nombre relativo, stat) de cada fichero del dataset en disco."""
+        file_path = f"uploads/user_{dataset.user_id}/dataset_{dataset.id}/"
+        # DirEntry.stat() reutiliza lo que ya devolvió scandir, sin otra llamada al sistema en Linux
+        return [(entry.path, os.path.relpath(entry.path, file_path), entry.stat()) for entry in _iter_files(file_path)]
+
+    def get_dataset_zip_path(self, dataset: BaseDataset, compress: bool = False, files: Optional[list] = None) -> str:
+        """
+        Ruta absoluta del ZIP del dataset en la caché. Puede no existir todavía.
+
+        El nombre incluye la versión y una huella de los ficheros en disco (nombre, tamaño y mtime): si los
+        ficheros cambian sin que llegue a crearse versión nueva, el ZIP anterior deja de servirse.
+        """
+        if files is None:
+            files = self._scan_dataset_files(dataset)
+        fingerprint = hashlib.blake2b(digest_size=8)
+        for _, relpath, stat in sorted(files, key=lambda f: f[1]):
+            fingerprint.update(f"{relpath}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+
+        latest_version = dataset.get_latest_version()
+        version_number = latest_version.version_number if latest_version else "0.0.0"
+        suffix = "_deflated" if compress else ""
+        return os.path.join(
+            os.path.abspath(DATASET_ZIP_CACHE_DIR),
+            f"dataset_{dataset.id}_v{version_number}_{fingerprint.hexdigest()}{suffix}.zip",
+        )
+
+    def get_cached_dataset_zip(self, dataset: BaseDataset, compress: bool = False) -> Optional[str]:
+        """Ruta del ZIP ya generado para el contenido actual del dataset, o None si aún no se ha generado."""
+        zip_path = self.get_dataset_zip_path(dataset, compress)
+        return zip_path if os.path.exists(zip_path) else None
+
+    def stream_dataset_zip(self, dataset: BaseDataset, compress: bool = False) -> Iterator[bytes]:
+        """
+        Genera el ZIP del dataset por bloques, a medida que se leen los ficheros.
+
+        Lo escrito se copia también a la caché, de modo que las siguientes descargas
+        del mismo contenido se sirven con get_cached_dataset_zip(); los ZIP anteriores del dataset se borran.
+        Sin `compress` los ficheros se guardan tal cual (ZIP_STORED); con él, DEFLATE.
+        """
+        files = self._scan_dataset_files(dataset)
+        entries = [(path, os.path.join(f"dataset_{dataset.id}", relpath)) for path, relpath, _ in files]
+        total_size = sum(stat.st_size for _, _, stat in files)
+
+        allow_zip64 = _needs_zip64(total_size, len(entries))
+        zip_path = self.get_dataset_zip_path(dataset, compress, files)
+        return _stream_zip(entries, zip_path, compress, allow_zip64, stale_prefix=f"dataset_{dataset.id}_")
+
+    def get_dataset_zip_etag(self, zip_path: str) -> str:
+        """ETag fuerte del ZIP: es el propio hash del contenido, calculado una vez por fichero."""
+        stat = os.stat(zip_path)
+        return _zip_digest(zip_path, stat.st_mtime_ns, stat.st_size)
 
     def get_synchronized(self, current_user_id: int) -> BaseDataset:
         return self.repository.get_synchronized(current_user_id)
@@ -114,6 +356,15 @@ class DataSetService(BaseService):
     def get_unsynchronized(self, current_user_id: int) -> BaseDataset:
         return self.repository.get_unsynchronized(current_user_id)
 
+    def get_by_doi_with_details(self, doi: str) -> Optional[BaseDataset]:
+        return self.repository.get_by_doi_with_details(doi)
+
+    def get_with_feature_models(self, dataset_id: int) -> Optional[BaseDataset]:
+        return self.repository.get_with_feature_models(dataset_id)
+
+    def get_with_details(self, dataset_id: int) -> Optional[BaseDataset]:
+        return self.repository.get_with_details(dataset_id)
+
     def get_unsynchronized_dataset(self, current_user_id: int, dataset_id: int) -> BaseDataset:
         return self.repository.get_unsynchronized_dataset(current_user_id, dataset_id)
 
@@ -149,8 +400,8 @@ class DataSetService(BaseService):
         if form.feature_models and len(form.feature_models) > 0:
             first = form.feature_models[0]
             filename = (first.uvl_filename.data or "").strip()
-            _, ext = os.path.splitext(filename.lower())
-            handler = DATA_TYPE_REGISTRY.get(ext)
+            _, dot, ext = filename.rpartition(".")
+            handler = DATA_TYPE_REGISTRY.get(dot + ext.lower())
             if handler:
                 return handler.name
 
@@ -164,39 +415,11 @@ class DataSetService(BaseService):
         if not form.feature_models or len(form.feature_models) == 0:
             raise ValueError("At least one file is required to create a dataset")
 
-        # 1. Crear DSMetaData
-        dsmetadata_dict = form.get_dsmetadata()
-        dsmetadata = self.dsmetadata_repository.create(**dsmetadata_dict)
-
-        # 2. Inferir tipo de dataset según archivos subidos
-        dataset_kind = "base"
-        if form.feature_models:
-            first_file = form.feature_models[0].filename.data
-            dataset_kind = infer_kind_from_filename(first_file)
-
-        # 3. Obtener descriptor y crear instancia del tipo correcto
-        descriptor = get_descriptor(dataset_kind)
-
-        try:
-            dataset = descriptor.model_class(
-                user_id=current_user.id, ds_meta_data_id=dsmetadata.id, dataset_kind=dataset_kind
-            )
-
-            # Añadir a la sesión y hacer flush para obtener el ID
-            self.repository.session.add(dataset)
-            self.repository.session.flush()
-
-        except Exception as exc:
-            logger.error(f"Error creating dataset: {exc}")
-            self.dsmetadata_repository.session.rollback()
-            raise exc
-
-        # 4. Crear autores
-        for author_data in form.get_authors():
-            author = self.author_repository.create(commit=False, ds_meta_data_id=dsmetadata.id, **author_data)
-            dsmetadata.authors.append(author)
-
-        # 5. Procesar feature models (archivos)
+        # 1. Validar los archivos y calcular checksum y tamaño antes de escribir nada en la BD.
+        # Es solo E/S y hashing (hashlib libera el GIL), así que los ficheros se procesan en paralelo
+        file_forms = []
+        file_handlers = []
+        handlers_by_ext = {}  # lo habitual es que todos los ficheros compartan extensión
         for feature_model_form in form.feature_models:
             filename = feature_model_form.filename.data
 
@@ -205,42 +428,98 @@ class DataSetService(BaseService):
                 logger.warning("Skipping feature model with empty filename")
                 continue
 
-            # Crear FM metadata
-            fmmetadata_dict = feature_model_form.get_fmmetadata()
-            fmmetadata = self.fmmetadata_repository.create(commit=False, **fmmetadata_dict)
+            _, dot, ext = filename.rpartition(".")
+            ext = dot + ext.lower()
+            if ext not in handlers_by_ext:
+                try:
+                    handlers_by_ext[ext] = get_descriptor(infer_kind_from_filename(filename)).handler
+                except ValueError as e:
+                    logger.error(f"Validation failed for {filename}: {e}")
+                    raise ValueError(f"File validation failed: {str(e)}")
+
+            file_forms.append(feature_model_form)
+            file_handlers.append(handlers_by_ext[ext])
+
+        temp_folder = current_user.temp_folder()
+        workers = max(1, min(FILE_CHECK_WORKERS, len(file_forms)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="file-check") as executor:
+            futures = [
+                executor.submit(_validate_and_checksum, handler, os.path.join(temp_folder, fm_form.filename.data))
+                for fm_form, handler in zip(file_forms, file_handlers)
+            ]
+
+        # Se informa de todos los ficheros inválidos a la vez, no solo del primero
+        file_checks = []
+        errors = []
+        for feature_model_form, future in zip(file_forms, futures):
+            try:
+                file_checks.append(future.result())
+            except Exception as e:
+                logger.error(f"Validation failed for {feature_model_form.filename.data}: {e}")
+                errors.append(f"{feature_model_form.filename.data}: {e}")
+        if errors:
+            raise ValueError(f"File validation failed: {'; '.join(errors)}")
 
-            # Crear feature model
-            fm = self.feature_model_repository.create(
-                commit=False, data_set_id=dataset.id, fm_meta_data_id=fmmetadata.id
-            )
+        # Desde aquí todo va en una única transacción: cualquier fallo la deshace entera
+        try:
+            # 2. Crear DSMetaData (sin commit)
+            dsmetadata_dict = form.get_dsmetadata()
+            dsmetadata = self.dsmetadata_repository.create(commit=False, **dsmetadata_dict)
 
-            # Crear autores del feature model
-            for author_data in feature_model_form.get_authors():
-                author = self.author_repository.create(commit=False, fm_meta_data_id=fmmetadata.id, **author_data)
-                fmmetadata.authors.append(author)
+            # 3. Inferir tipo de dataset según archivos subidos
+            dataset_kind = "base"
+            if form.feature_models:
+                first_file = form.feature_models[0].filename.data
+                dataset_kind = infer_kind_from_filename(first_file)
 
-            # Validar archivo según su tipo
-            file_path = os.path.join(current_user.temp_folder(), filename)
-            descriptor_for_file = get_descriptor(infer_kind_from_filename(filename))
+            # 4. Obtener descriptor y crear instancia del tipo correcto
+            descriptor = get_descriptor(dataset_kind)
 
-            try:
-                descriptor_for_file.handler.validate(file_path)
-            except Exception as e:
-                logger.error(f"Validation failed for {filename}: {e}")
-                self.repository.session.rollback()
-                raise ValueError(f"File validation failed: {str(e)}")
+            dataset = descriptor.model_class(
+                user_id=current_user.id, ds_meta_data_id=dsmetadata.id, dataset_kind=dataset_kind
+            )
 
-            # Calcular checksum y tamaño
-            checksum, size = calculate_checksum_and_size(file_path)
+            # Añadir a la sesión y hacer flush para obtener el ID
+            self.repository.session.add(dataset)
+            self.repository.session.flush()
 
-            # Crear registro de archivo
-            file = self.hubfilerepository.create(
-                commit=False, name=filename, checksum=checksum, size=size, feature_model_id=fm.id
-            )
-            fm.files.append(file)
+            # 5. Autores del dataset; se insertan junto con los de los feature models en un solo INSERT (paso 7)
+            # (todas las filas llevan las dos FK para que vayan en el mismo lote)
+            author_rows = [
+                {**author_data, "ds_meta_data_id": dsmetadata.id, "fm_meta_data_id": None}
+                for author_data in form.get_authors()
+            ]
+
+            # 6. Feature models con sus metadatos y ficheros: se añaden a la sesión y se insertan en un único flush
+            fmmetadata_list = []
+            for feature_model_form, (checksum, size) in zip(file_forms, file_checks):
+                fmmetadata = FMMetaData(**feature_model_form.get_fmmetadata())
+                self.repository.session.add(
+                    FeatureModel(
+                        data_set_id=dataset.id,
+                        fm_meta_data=fmmetadata,
+                        files=[Hubfile(name=feature_model_form.filename.data, checksum=checksum, size=size)],
+                    )
+                )
+                fmmetadata_list.append((feature_model_form, fmmetadata))
+            self.repository.session.flush()
+
+            # Autores de cada feature model (ya con el id de su FMMetaData)
+            for feature_model_form, fmmetadata in fmmetadata_list:
+                author_rows.extend(
+                    {**author_data, "ds_meta_data_id": None, "fm_meta_data_id": fmmetadata.id}
+                    for author_data in feature_model_form.get_authors()
+                )
 
-        # Commit final
-        self.repository.session.commit()
+            # 7. Todos los autores de una vez
+            self.author_repository.create_many(author_rows)
+
+            # Commit final
+            self.repository.session.commit()
+        except Exception as exc:
+            logger.error(f"Error creating dataset: {exc}")
+            self.repository.session.rollback()
+            raise exc
 
         try:
             version = VersionService.create_version(
@@ -260,8 +539,7 @@ class DataSetService(BaseService):
         return self.dsmetadata_repository.update(id, **kwargs)
 
     def get_uvlhub_doi(self, dataset: BaseDataset) -> str:
-        domain = os.getenv("DOMAIN", "localhost")
-        return f"http://{domain}/doi/{dataset.ds_meta_data.dataset_doi}"
+        return build_uvlhub_doi(dataset.ds_meta_data.dataset_doi)
 
 
 class AuthorService(BaseService):
@@ -273,6 +551,9 @@ class DSDownloadRecordService(BaseService):
     def __init__(self):
         super().__init__(DSDownloadRecordRepository())
 
+    def record_download(self, user_id: Optional[int], dataset_id: int, download_cookie: str) -> bool:
+        return self.repository.create_if_not_exists(user_id, dataset_id, download_cookie)
+
 
 class DSMetaDataService(BaseService):
     def __init__(self):
@@ -295,15 +576,17 @@ class DSViewRecordService(BaseService):
     def create_new_record(self, dataset: BaseDataset, user_cookie: str):
         return self.repository.create_new_record(dataset, user_cookie)
 
+    def record_view(self, user_id: Optional[int], dataset_id: int, view_cookie: str) -> bool:
+        return self.repository.create_if_not_exists(user_id, dataset_id, view_cookie)
+
     def create_cookie(self, dataset: BaseDataset) -> str:
         user_cookie = request.cookies.get("view_cookie")
         if not user_cookie:
             user_cookie = str(uuid.uuid4())
 
-        existing_record = self.the_record_exists(dataset=dataset, user_cookie=user_cookie)
-
-        if not existing_record:
-            self.create_new_record(dataset=dataset, user_cookie=user_cookie)
+        # Comprobación e inserción en una sola sentencia
+        user_id = current_user.id if current_user.is_authenticated else None
+        self.record_view(user_id, dataset.id, user_cookie)
 
         return user_cookie
 
@@ -320,16 +603,18 @@ class DOIMappingService(BaseService):
             return None
 
 
+_SIZE_UNITS = ("bytes", "KB", "MB", "GB")
+_SIZE_DIVISORS = (1, 1024, 1024**2, 1024**3)
+
+
 class SizeService:
     def __init__(self):
         pass
 
-    def get_human_readable_size(self, size: int) -> str:
+    @staticmethod
+    def get_human_readable_size(size: int) -> str:
         if size < 1024:
             return f"{size} bytes"
-        elif size < 1024**2:
-            return f"{round(size / 1024, 2)} KB"
-        elif size < 1024**3:
-            return f"{round(size / (1024 ** 2), 2)} MB"
-        else:
-            return f"{round(size / (1024 ** 3), 2)} GB"
+        # Cada unidad son 10 bits más: el índice sale de la longitud en bits, sin ir comparando umbrales
+        unit = min((size.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+        return f"{round(size / _SIZE_DIVISORS[unit], 2)} {_SIZE_UNITS[unit]}"
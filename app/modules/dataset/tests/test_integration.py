@@ -236,3 +236,105 @@ class TestDatasetListFilters:
         login(test_client, "test@example.com", "test1234")
         response = test_client.get("/explore")  # Usar explore en vez de dataset/list
         assert response.status_code == 200
+
+
+class TestDatasetFileUploadStream:
+    """Tests para la subida de ficheros en bruto (application/octet-stream)"""
+
+    def test_upload_stream_requires_filename_header(self, test_client):
+        """Test: POST /dataset/file/upload_stream sin cabecera X-Filename"""
+        login(test_client, "test@example.com", "test1234")
+        response = test_client.post(
+            "/dataset/file/upload_stream", data=b"hello", content_type="application/octet-stream"
+        )
+        assert response.status_code == 400
+
+    def test_upload_stream_invalid_extension(self, test_client):
+        """Test: POST /dataset/file/upload_stream con extensión no permitida"""
+        login(test_client, "test@example.com", "test1234")
+        response = test_client.post(
+            "/dataset/file/upload_stream",
+            data=b"hello",
+            content_type="application/octet-stream",
+            headers={"X-Filename": "notes.txt"},
+        )
+        assert response.status_code == 400
+        assert "Invalid file type" in response.get_json()["message"]
+
+
+class TestDatasetFileUpload:
+    """Tests para la subida multipart de ficheros a la carpeta temporal"""
+
+    def test_upload_without_file_part(self, test_client):
+        """Test: POST /dataset/file/upload sin parte 'file'"""
+        login(test_client, "test@example.com", "test1234")
+        response = test_client.post("/dataset/file/upload", data={"other": "value"})
+        assert response.status_code == 400
+
+    def test_upload_invalid_extension(self, test_client):
+        """Test: POST /dataset/file/upload con extensión no permitida"""
+        import io
+
+        login(test_client, "test@example.com", "test1234")
+        response = test_client.post(
+            "/dataset/file/upload",
+            data={"file": (io.BytesIO(b"hello"), "notes.txt")},
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 400
+        assert "Invalid file type" in response.get_json()["message"]
+
+
+class TestDatasetEditFlash:
+    """Tests para los mensajes que deja la edición de un dataset"""
+
+    def test_edit_flashes_success_once(self, test_client):
+        """Test: POST /dataset/<id>/edit con cambios deja un único mensaje de éxito"""
+        from app.modules.dataset.models import DSMetaData, PublicationType, UVLDataset
+
+        with test_client.application.app_context():
+            user = User.query.filter_by(email="test@example.com").first()
+            metadata = DSMetaData(
+                title="Edit flash dataset", description="Test description", publication_type=PublicationType.NONE
+            )
+            db.session.add(metadata)
+            db.session.commit()
+            dataset = UVLDataset(user_id=user.id, ds_meta_data_id=metadata.id)
+            db.session.add(dataset)
+            db.session.commit()
+            dataset_id = dataset.id
+
+        login(test_client, "test@example.com", "test1234")
+        with test_client.session_transaction() as sess:
+            sess.pop("_flashes", None)
+
+        response = test_client.post(f"/dataset/{dataset_id}/edit", data={"title": "Edit flash dataset (renamed)"})
+        assert response.status_code == 302
+
+        with test_client.session_transaction() as sess:
+            flashes = sess.get("_flashes", [])
+
+        success = [message for category, message in flashes if category == "success"]
+        assert len(success) == 1
+        assert success[0].startswith("Dataset updated successfully!")
+
+
+class TestDatasetUploadPage:
+    """Tests para la limpieza de la carpeta temporal al abrir /dataset/upload"""
+
+    def test_upload_page_empties_temp_folder(self, test_client):
+        """Test: GET /dataset/upload borra lo que quedara de una subida anterior"""
+        import os
+
+        with test_client.application.app_context():
+            temp_folder = User.query.filter_by(email="test@example.com").first().temp_folder()
+        os.makedirs(temp_folder, exist_ok=True)
+        with open(os.path.join(temp_folder, "leftover.uvl"), "w") as f:
+            f.write("features")
+
+        login(test_client, "test@example.com", "test1234")
+        response = test_client.get("/dataset/upload")
+
+        assert response.status_code == 200
+        assert os.path.isdir(temp_folder)
+        assert os.listdir(temp_folder) == []
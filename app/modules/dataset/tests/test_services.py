@@ -3,7 +3,15 @@ import pytest
 from app import db
 from app.modules.auth.models import User
 from app.modules.dataset.models import DSMetaData, PublicationType, UVLDataset
-from app.modules.dataset.services import DataSetService, DOIMappingService, DSViewRecordService  # ← Cambio aquí
+from app.modules.dataset.repositories import AuthorRepository
+from app.modules.dataset.services import (
+    AuthorService,
+    DataSetService,
+    DOIMappingService,
+    DSMetaDataService,
+    DSViewRecordService,
+    SizeService,
+)
 
 
 @pytest.fixture(scope="module")
@@ -18,14 +26,23 @@ def test_client(test_client):
     yield test_client
 
 
-@pytest.fixture(scope="function")
-def sample_user():
+@pytest.fixture(scope="module", autouse=True)
+def app_ctx(test_client):
+    """Un único contexto de aplicación para todos los tests del módulo"""
+    ctx = test_client.application.app_context()
+    ctx.push()
+    yield
+    ctx.pop()
+
+
+@pytest.fixture(scope="module")
+def sample_user(test_client):
     return User.query.filter_by(email="test@example.com").first()
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="module")
 def sample_metadata(sample_user):
-    """Fixture para crear metadata de dataset"""
+    """Metadata de dataset compartida por todos los tests del módulo"""
     metadata = DSMetaData(
         title="Test Dataset",
         description="Dataset for unit testing",
@@ -51,71 +68,62 @@ class TestDataSetService:
 
     def test_service_initialization(self, test_client):
         """Test: Inicializar el servicio correctamente"""
-        with test_client.application.app_context():
-            service = DataSetService()
-            assert service is not None
-            assert hasattr(service, "repository")
+        service = DataSetService()
+        assert service is not None
+        assert hasattr(service, "repository")
 
     def test_count_synchronized_datasets(self, test_client):
         """Test: Contar datasets sincronizados"""
-        with test_client.application.app_context():
-            service = DataSetService()
-            count = service.count_synchronized_datasets()
-            assert isinstance(count, int)
-            assert count >= 0
+        service = DataSetService()
+        count = service.count_synchronized_datasets()
+        assert isinstance(count, int)
+        assert count >= 0
 
     def test_count_authors(self, test_client):
         """Test: Contar autores en el sistema"""
-        with test_client.application.app_context():
-            service = DataSetService()
-            count = service.count_authors()
-            assert isinstance(count, int)
-            assert count >= 0
+        service = DataSetService()
+        count = service.count_authors()
+        assert isinstance(count, int)
+        assert count >= 0
 
     def test_count_dsmetadata(self, test_client):
         """Test: Contar metadata de datasets"""
-        with test_client.application.app_context():
-            service = DataSetService()
-            count = service.count_dsmetadata()
-            assert isinstance(count, int)
-            assert count >= 0
+        service = DataSetService()
+        count = service.count_dsmetadata()
+        assert isinstance(count, int)
+        assert count >= 0
 
     def test_total_dataset_downloads(self, test_client):
         """Test: Total de descargas de datasets"""
-        with test_client.application.app_context():
-            service = DataSetService()
-            total = service.total_dataset_downloads()
-            assert isinstance(total, int)
-            assert total >= 0
+        service = DataSetService()
+        total = service.total_dataset_downloads()
+        assert isinstance(total, int)
+        assert total >= 0
 
     def test_total_dataset_views(self, test_client):
         """Test: Total de vistas de datasets"""
-        with test_client.application.app_context():
-            service = DataSetService()
-            total = service.total_dataset_views()
-            assert isinstance(total, int)
-            assert total >= 0
+        service = DataSetService()
+        total = service.total_dataset_views()
+        assert isinstance(total, int)
+        assert total >= 0
 
     def test_get_synchronized(self, test_client, sample_user):
         """Test: Obtener datasets sincronizados de un usuario"""
-        with test_client.application.app_context():
-            service = DataSetService()
-            datasets = service.get_synchronized(sample_user.id)
-            assert datasets is not None
+        service = DataSetService()
+        datasets = service.get_synchronized(sample_user.id)
+        assert datasets is not None
 
     def test_get_unsynchronized(self, test_client, sample_user):
         """Test: Obtener datasets no sincronizados de un usuario"""
-        with test_client.application.app_context():
-            service = DataSetService()
-            datasets = service.get_unsynchronized(sample_user.id)
-            assert datasets is not None
+        service = DataSetService()
+        datasets = service.get_unsynchronized(sample_user.id)
+        assert datasets is not None
 
     def test_latest_synchronized(self, test_client):
         """Test: Obtener los últimos datasets sincronizados"""
-        with test_client.application.app_context():
-            service = DataSetService()
-            datasets = service.latest_synchronized()
-            assert datasets is not None
+        service = DataSetService()
+        datasets = service.latest_synchronized()
+        assert datasets is not None
 
 
 class TestAuthorService:
@@ -123,11 +131,29 @@ class TestAuthorService:
 
     def test_author_service_initialization(self, test_client):
         """Test: Inicializar AuthorService"""
-        with test_client.application.app_context():
-            from app.modules.dataset.services import AuthorService
+        service = AuthorService()
+        assert service is not None
+
+    def test_create_many_authors(self, test_client, sample_metadata):
+        """Test: AuthorRepository.create_many() inserta todas las filas en un solo paso"""
+        rows = [
+            {
+                "name": f"Bulk Author {i}",
+                "affiliation": "Test",
+                "orcid": None,
+                "ds_meta_data_id": sample_metadata.id,
+            }
+            for i in range(3)
+        ]
+        AuthorRepository().create_many(rows)
+        db.session.commit()
 
-            service = AuthorService()
-            assert service is not None
+        db.session.refresh(sample_metadata)
+        assert sorted(a.name for a in sample_metadata.authors) == [f"Bulk Author {i}" for i in range(3)]
+
+        for author in sample_metadata.authors:
+            db.session.delete(author)
+        db.session.commit()
 
 
 class TestDSMetaDataService:
@@ -135,76 +161,47 @@ class TestDSMetaDataService:
 
     def test_dsmetadata_service_initialization(self, test_client):
         """Test: Inicializar DSMetaDataService"""
-        with test_client.application.app_context():
-            from app.modules.dataset.services import DSMetaDataService
-
-            service = DSMetaDataService()
-            assert service is not None
+        service = DSMetaDataService()
+        assert service is not None
 
     def test_filter_by_doi(self, test_client):
         """Test: Buscar metadata por DOI"""
-        with test_client.application.app_context():
-            from app.modules.dataset.services import DSMetaDataService
-
-            # Crear metadata con DOI
-            metadata = DSMetaData(
-                title="Test DOI",
-                description="Test",
-                publication_type=PublicationType.NONE,
-                dataset_doi="10.1234/test.filter",
-            )
-            db.session.add(metadata)
-            db.session.commit()
+        # Crear metadata con DOI
+        metadata = DSMetaData(
+            title="Test DOI",
+            description="Test",
+            publication_type=PublicationType.NONE,
+            dataset_doi="10.1234/test.filter",
+        )
+        db.session.add(metadata)
+        db.session.commit()
 
-            service = DSMetaDataService()
-            result = service.filter_by_doi("10.1234/test.filter")
+        service = DSMetaDataService()
+        result = service.filter_by_doi("10.1234/test.filter")
 
-            assert result is not None
-            assert result.dataset_doi == "10.1234/test.filter"
+        assert result is not None
+        assert result.dataset_doi == "10.1234/test.filter"
 
-            # Cleanup
-            db.session.delete(metadata)
-            db.session.commit()
+        # Cleanup
+        db.session.delete(metadata)
+        db.session.commit()
 
 
 class TestSizeService:
     """Tests para SizeService"""
 
-    def test_size_service_human_readable_bytes(self, test_client):
-        """Test: Convertir bytes a formato legible"""
-        with test_client.application.app_context():
-            from app.modules.dataset.services import SizeService
-
-            service = SizeService()
-
-            assert "bytes" in service.get_human_readable_size(500)
-
-    def test_size_service_human_readable_kb(self, test_client):
-        """Test: Convertir KB a formato legible"""
-        with test_client.application.app_context():
-            from app.modules.dataset.services import SizeService
-
-            service = SizeService()
-
-            assert "KB" in service.get_human_readable_size(2048)
-
-    def test_size_service_human_readable_mb(self, test_client):
-        """Test: Convertir MB a formato legible"""
-        with test_client.application.app_context():
-            from app.modules.dataset.services import SizeService
-
-            service = SizeService()
-
-            assert "MB" in service.get_human_readable_size(2 * 1024 * 1024)
-
-    def test_size_service_human_readable_gb(self, test_client):
-        """Test: Convertir GB a formato legible"""
-        with test_client.application.app_context():
-            from app.modules.dataset.services import SizeService
-
-            service = SizeService()
-
-            assert "GB" in service.get_human_readable_size(2 * 1024 * 1024 * 1024)
+    @pytest.mark.parametrize(
+        "size, unit",
+        [
+            (500, "bytes"),
+            (2048, "KB"),
+            (2 * 1024 * 1024, "MB"),
+            (2 * 1024 * 1024 * 1024, "GB"),
+        ],
+    )
+    def test_size_service_human_readable(self, size, unit):
+        """Test: Convertir bytes a formato legible en cada unidad"""
+        assert unit in SizeService.get_human_readable_size(size)
 
 
 # ============================================
@@ -217,34 +214,49 @@ class TestDataSetServiceMethods:
 
     def test_count_feature_models(self, test_client):
         """Cubre método count_feature_models()"""
-        with test_client.application.app_context():
-            service = DataSetService()
-            count = service.count_feature_models()
-            assert isinstance(count, int)
-            assert count >= 0
+        service = DataSetService()
+        count = service.count_feature_models()
+        assert isinstance(count, int)
+        assert count >= 0
+
+    def test_get_uvlhub_doi_uses_domain_prefix(self, test_client):
+        """get_uvlhub_doi() concatena el DOI al prefijo cacheado del dominio"""
+        from app.modules.dataset.services import _uvlhub_doi_prefix
+
+        dataset = UVLDataset(ds_meta_data=DSMetaData(dataset_doi="10.1234/abc"))
+
+        assert DataSetService().get_uvlhub_doi(dataset) == _uvlhub_doi_prefix() + "10.1234/abc"
+        assert dataset.get_uvlhub_doi() == DataSetService().get_uvlhub_doi(dataset)
+
+    def test_get_uvlhub_doi_without_doi(self, test_client):
+        """get_uvlhub_doi() no falla en datasets sin sincronizar (DOI None)"""
+        from app.modules.dataset.services import _uvlhub_doi_prefix
+
+        dataset = UVLDataset(ds_meta_data=DSMetaData(dataset_doi=None))
+
+        assert dataset.get_uvlhub_doi() == f"{_uvlhub_doi_prefix()}None"
 
     def test_move_feature_models_no_files(self, test_client, sample_user):
         """Cubre move_feature_models() sin archivos"""
-        with test_client.application.app_context():
-            from app.modules.dataset.models import DSMetaData, PublicationType, UVLDataset
+        from app.modules.dataset.models import DSMetaData, PublicationType, UVLDataset
 
-            metadata = DSMetaData(title="Test Move", description="Test", publication_type=PublicationType.NONE)
-            db.session.add(metadata)
-            db.session.commit()
+        metadata = DSMetaData(title="Test Move", description="Test", publication_type=PublicationType.NONE)
+        db.session.add(metadata)
+        db.session.commit()
 
-            dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=metadata.id)
-            db.session.add(dataset)
-            db.session.commit()
+        dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=metadata.id)
+        db.session.add(dataset)
+        db.session.commit()
 
-            service = DataSetService()
+        service = DataSetService()
 
-            # No debe fallar aunque no haya archivos
-            try:
-                service.move_feature_models(dataset)
-                assert True
-            except Exception as e:
-                # Es OK si falla por archivos no encontrados
-                assert "not found" in str(e).lower() or len(dataset.feature_models) == 0
+        # No debe fallar aunque no haya archivos
+        try:
+            service.move_feature_models(dataset)
+            assert True
+        except Exception as e:
+            # Es OK si falla por archivos no encontrados
+            assert "not found" in str(e).lower() or len(dataset.feature_models) == 0
 
 
 class TestDOIMappingServiceMethods:
@@ -252,10 +264,9 @@ class TestDOIMappingServiceMethods:
 
     def test_get_new_doi_nonexistent(self, test_client):
         """Cubre get_new_doi() con DOI inexistente"""
-        with test_client.application.app_context():
-            service = DOIMappingService()
-            result = service.get_new_doi("10.9999/old.fake.doi")
-            assert result is None
+        service = DOIMappingService()
+        result = service.get_new_doi("10.9999/old.fake.doi")
+        assert result is None
 
 
 class TestDSViewRecordServiceMethods:
@@ -263,19 +274,129 @@ class TestDSViewRecordServiceMethods:
 
     def test_create_cookie_generates_uuid(self, test_client, sample_user, sample_metadata):
         """Cubre create_cookie()"""
-        with test_client.application.app_context():
-            from app.modules.dataset.models import UVLDataset
+        from app.modules.dataset.models import UVLDataset
 
-            dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
-            db.session.add(dataset)
-            db.session.commit()
+        dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
+        db.session.add(dataset)
+        db.session.commit()
+
+        service = DSViewRecordService()
+
+        # Debe generar un UUID válido
+        with test_client.application.test_request_context():
+            cookie = service.create_cookie(dataset)
+
+            assert cookie is not None
+            assert isinstance(cookie, str)
+            assert len(cookie) > 0
+
+    def test_record_view_only_once_per_cookie(self, test_client, sample_user, sample_metadata):
+        """Cubre record_view(): una segunda visita con la misma cookie no crea otro registro"""
+        from app.modules.dataset.models import DSViewRecord
+
+        dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
+        db.session.add(dataset)
+        db.session.commit()
+
+        service = DSViewRecordService()
+
+        assert service.record_view(None, dataset.id, "cookie-view-test") is True
+        assert service.record_view(None, dataset.id, "cookie-view-test") is False
+        assert service.record_view(sample_user.id, dataset.id, "cookie-view-test") is True
+
+        records = DSViewRecord.query.filter_by(dataset_id=dataset.id).all()
+        assert len(records) == 2
+
+        for record in records:
+            db.session.delete(record)
+        db.session.commit()
+
+
+class TestDSDownloadRecordServiceMethods:
+    """Tests para DSDownloadRecordService"""
+
+    def test_record_download_only_once_per_cookie(self, test_client, sample_user, sample_metadata):
+        """Cubre record_download(): una segunda descarga con la misma cookie no crea otro registro"""
+        from app.modules.dataset.models import DSDownloadRecord
+        from app.modules.dataset.services import DSDownloadRecordService
+
+        dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
+        db.session.add(dataset)
+        db.session.commit()
+
+        service = DSDownloadRecordService()
+
+        assert service.record_download(None, dataset.id, "cookie-download-test") is True
+        assert service.record_download(None, dataset.id, "cookie-download-test") is False
+        assert service.record_download(sample_user.id, dataset.id, "cookie-download-test") is True
+
+        records = DSDownloadRecord.query.filter_by(dataset_id=dataset.id).all()
+        assert len(records) == 2
+
+        for record in records:
+            db.session.delete(record)
+        db.session.commit()
+
+
+class TestSaveUploadedFile:
+    """Tests para save_uploaded_file_with_checksum()"""
+
+    def test_save_with_checksum_matches_calculate_checksum_and_size(self, tmp_path):
+        """El checksum y el tamaño calculados al guardar coinciden con los de releer el fichero"""
+        import io
+
+        from werkzeug.datastructures import FileStorage
+
+        from app.modules.dataset.services import calculate_checksum_and_size, save_uploaded_file_with_checksum
+
+        content = b"<gpx></gpx>" * 200_000
+        dest = tmp_path / "track.gpx"
+
+        result = save_uploaded_file_with_checksum(
+            FileStorage(stream=io.BytesIO(content), filename="track.gpx"), str(dest)
+        )
+
+        assert dest.read_bytes() == content
+        assert result == calculate_checksum_and_size(str(dest))
+
+    def test_calculate_checksum_and_size(self, tmp_path):
+        """calculate_checksum_and_size() lee por bloques pero da el mismo hash que el contenido entero"""
+        import hashlib
+
+        from app.modules.dataset.services import calculate_checksum_and_size
+
+        content = b"features\n    Root\n" * 100_000
+        path = tmp_path / "model.uvl"
+        path.write_bytes(content)
+
+        expected = hashlib.blake2b(content, digest_size=16).hexdigest()
+        assert calculate_checksum_and_size(str(path)) == (expected, len(content))
+
+
+class TestDatasetZipCache:
+    """Tests para la caché de ZIPs de descarga"""
+
+    def test_stream_zip_prunes_stale_archives(self, tmp_path):
+        """Al guardar un ZIP nuevo se borran los antiguos del dataset, pero no la otra variante ni otros datasets"""
+        from app.modules.dataset.services import _stream_zip
 
-            service = DSViewRecordService()
+        source = tmp_path / "model.uvl"
+        source.write_bytes(b"features\n    Root\n")
+        cache = tmp_path / "cache"
+        cache.mkdir()
+        for name in (
+            "dataset_1_v1.0.0_old.zip",
+            "dataset_1_v1.0.0_old_deflated.zip",
+            "dataset_1_v1.0.1_new_deflated.zip",
+            "dataset_12_v1.0.0_old.zip",
+        ):
+            (cache / name).write_bytes(b"")
 
-            # Debe generar un UUID válido
-            with test_client.application.test_request_context():
-                cookie = service.create_cookie(dataset)
+        zip_path = cache / "dataset_1_v1.0.1_new.zip"
+        b"".join(_stream_zip([(str(source), "dataset_1/model.uvl")], str(zip_path), stale_prefix="dataset_1_"))
 
-                assert cookie is not None
-                assert isinstance(cookie, str)
-                assert len(cookie) > 0
+        assert sorted(p.name for p in cache.iterdir()) == [
+            "dataset_12_v1.0.0_old.zip",
+            "dataset_1_v1.0.1_new.zip",
+            "dataset_1_v1.0.1_new_deflated.zip",
+        ]
@@ -1,8 +1,27 @@
+import hashlib
+
 import pytest
+from sqlalchemy.orm import scoped_session, sessionmaker
 
 from app import db
 from app.modules.auth.models import User
-from app.modules.dataset.models import BaseDataset, DSMetaData, GPXDataset, PublicationType, UVLDataset
+from app.modules.dataset import services
+from app.modules.dataset.models import (
+    BaseDataset,
+    DSMetaData,
+    GPXDataset,
+    PublicationType,
+    UVLDataset,
+    _cached_file_stats,
+    _uvl_file_stats,
+)
+from app.modules.dataset.registry import (
+    get_all_descriptors,
+    get_allowed_extensions,
+    get_descriptor,
+    infer_kind_from_filename,
+)
+from app.modules.dataset.services import AuthorService, DSMetaDataService, calculate_checksum_and_size
 
 
 @pytest.fixture(scope="module")
@@ -19,12 +38,38 @@ def test_client_dataset(test_client):
     yield test_client
 
 
-@pytest.fixture(scope="function")
-def sample_user():
+@pytest.fixture(scope="module", autouse=True)
+def app_ctx(test_client):
+    """Un único contexto de aplicación para todos los tests del módulo"""
+    ctx = test_client.application.app_context()
+    ctx.push()
+    yield
+    ctx.pop()
+
+
+@pytest.fixture(autouse=True)
+def db_rollback(app_ctx):
+    """Cada test corre dentro de una transacción que se deshace al terminar"""
+    connection = db.engine.connect()
+    transaction = connection.begin()
+    original_session = db.session
+    # Los commit() del código bajo prueba pasan a ser savepoints dentro de la transacción externa
+    db.session = scoped_session(sessionmaker(bind=connection, join_transaction_mode="create_savepoint"))
+    try:
+        yield
+    finally:
+        db.session.remove()
+        db.session = original_session
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(scope="module")
+def sample_user(test_client):
     return User.query.filter_by(email="test@example.com").first()
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="module")
 def sample_metadata(sample_user):
     metadata = DSMetaData(
         title="Test Dataset",
@@ -48,118 +93,112 @@ def sample_metadata(sample_user):
 class TestDSMetaData:
 
     def test_create_metadata(self, test_client):
-        with test_client.application.app_context():
-            metadata = DSMetaData(
-                title="Test Metadata", description="Test Description", publication_type=PublicationType.NONE
-            )
-            db.session.add(metadata)
-            db.session.commit()
-
-            assert metadata.id is not None
-            assert metadata.title == "Test Metadata"
-            assert metadata.description == "Test Description"
+        metadata = DSMetaData(
+            title="Test Metadata", description="Test Description", publication_type=PublicationType.NONE
+        )
+        db.session.add(metadata)
+        db.session.flush()
 
-            db.session.delete(metadata)
-            db.session.commit()
+        assert metadata.id is not None
+        assert metadata.title == "Test Metadata"
+        assert metadata.description == "Test Description"
 
     def test_metadata_with_doi(self, test_client):
-        with test_client.application.app_context():
-            metadata = DSMetaData(
-                title="Published Dataset",
-                description="Dataset with DOI",
-                publication_type=PublicationType.JOURNAL_ARTICLE,
-                dataset_doi="10.1234/test.doi",
-            )
-            db.session.add(metadata)
-            db.session.commit()
-
-            assert metadata.dataset_doi == "10.1234/test.doi"
-            assert metadata.publication_type == PublicationType.JOURNAL_ARTICLE
+        metadata = DSMetaData(
+            title="Published Dataset",
+            description="Dataset with DOI",
+            publication_type=PublicationType.JOURNAL_ARTICLE,
+            dataset_doi="10.1234/test.doi",
+        )
+        db.session.add(metadata)
+        db.session.flush()
 
-            db.session.delete(metadata)
-            db.session.commit()
+        assert metadata.dataset_doi == "10.1234/test.doi"
+        assert metadata.publication_type == PublicationType.JOURNAL_ARTICLE
 
 
 class TestBaseDataset:
 
     def test_create_base_dataset(self, test_client, sample_user, sample_metadata):
-        with test_client.application.app_context():
-            dataset = BaseDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
-            db.session.add(dataset)
-            db.session.commit()
+        dataset = BaseDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
+        db.session.add(dataset)
+        db.session.flush()
 
-            assert dataset.id is not None
-            assert dataset.user_id == sample_user.id
-            assert dataset.created_at is not None
+        assert dataset.id is not None
+        assert dataset.user_id == sample_user.id
+        assert dataset.created_at is not None
 
     def test_dataset_user_relationship(self, test_client, sample_user, sample_metadata):
-        with test_client.application.app_context():
-            dataset = BaseDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
-            db.session.add(dataset)
-            db.session.commit()
+        dataset = BaseDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
+        db.session.add(dataset)
+        db.session.flush()
 
-            assert dataset.user.id == sample_user.id
-            assert dataset.user.email == "test@example.com"
+        assert dataset.user.id == sample_user.id
+        assert dataset.user.email == "test@example.com"
 
 
 class TestUVLDataset:
 
     def test_create_uvl_dataset(self, test_client, sample_user, sample_metadata):
-        with test_client.application.app_context():
-            dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
-            db.session.add(dataset)
-            db.session.commit()
+        dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
+        db.session.add(dataset)
+        db.session.flush()
 
-            assert dataset.id is not None
-            assert dataset.dataset_kind == "uvl"
+        assert dataset.id is not None
+        assert dataset.dataset_kind == "uvl"
 
     def test_uvl_dataset_metrics(self, test_client, sample_user, sample_metadata):
-        with test_client.application.app_context():
-            dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
-            db.session.add(dataset)
-            db.session.commit()
+        dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
+        db.session.add(dataset)
+        db.session.flush()
+
+        assert hasattr(dataset, "calculate_total_features")
+        assert hasattr(dataset, "calculate_total_constraints")
 
-            assert hasattr(dataset, "calculate_total_features")
-            assert hasattr(dataset, "calculate_total_constraints")
+        features = dataset.calculate_total_features()
+        constraints = dataset.calculate_total_constraints()
 
-            features = dataset.calculate_total_features()
-            constraints = dataset.calculate_total_constraints()
+        assert features is not None or features == 0
+        assert constraints is not None or constraints == 0
 
-            assert features is not None or features == 0
-            assert constraints is not None or constraints == 0
+    def test_uvl_file_stats_counts_features_and_constraints(self, tmp_path):
+        model = tmp_path / "model.uvl"
+        model.write_text(
+            'features\n    Root\n        mandatory\n            "A"\n            B\n' "constraints\n    A => B\n"
+        )
+
+        assert _cached_file_stats(_uvl_file_stats, str(model)) == (3, 1)
 
 
 class TestGPXDataset:
 
     def test_create_gpx_dataset(self, test_client, sample_user, sample_metadata):
-        with test_client.application.app_context():
-            dataset = GPXDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
-            db.session.add(dataset)
-            db.session.commit()
+        dataset = GPXDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
+        db.session.add(dataset)
+        db.session.flush()
 
-            assert dataset.id is not None
-            assert dataset.dataset_kind == "gpx"
+        assert dataset.id is not None
+        assert dataset.dataset_kind == "gpx"
 
     def test_gpx_dataset_metrics(self, test_client, sample_user, sample_metadata):
-        with test_client.application.app_context():
-            dataset = GPXDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
-            db.session.add(dataset)
-            db.session.commit()
+        dataset = GPXDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
+        db.session.add(dataset)
+        db.session.flush()
 
-            assert hasattr(dataset, "calculate_total_distance")
-            assert hasattr(dataset, "calculate_total_elevation_gain")
-            assert hasattr(dataset, "count_total_points")
-            assert hasattr(dataset, "count_tracks")
+        assert hasattr(dataset, "calculate_total_distance")
+        assert hasattr(dataset, "calculate_total_elevation_gain")
+        assert hasattr(dataset, "count_total_points")
+        assert hasattr(dataset, "count_tracks")
 
-            distance = dataset.calculate_total_distance()
-            elevation = dataset.calculate_total_elevation_gain()
-            points = dataset.count_total_points()
-            tracks = dataset.count_tracks()
+        distance = dataset.calculate_total_distance()
+        elevation = dataset.calculate_total_elevation_gain()
+        points = dataset.count_total_points()
+        tracks = dataset.count_tracks()
 
-            assert distance is not None or distance == 0
-            assert elevation is not None or elevation == 0
-            assert points is not None or points == 0
-            assert tracks is not None or tracks == 0
+        assert distance is not None or distance == 0
+        assert elevation is not None or elevation == 0
+        assert points is not None or points == 0
+        assert tracks is not None or tracks == 0
 
 
 class TestPublicationType:
@@ -169,170 +208,195 @@ class TestPublicationType:
         assert hasattr(PublicationType, "JOURNAL_ARTICLE")
 
     def test_metadata_with_different_publication_types(self, test_client):
-        with test_client.application.app_context():
-            pub_types = [PublicationType.NONE, PublicationType.JOURNAL_ARTICLE]
+        pub_types = [PublicationType.NONE, PublicationType.JOURNAL_ARTICLE]
 
-            for pub_type in pub_types:
-                metadata = DSMetaData(title=f"Dataset {pub_type.name}", description="Test", publication_type=pub_type)
-                db.session.add(metadata)
-                db.session.commit()
+        metas = [
+            DSMetaData(title=f"Dataset {pub_type.name}", description="Test", publication_type=pub_type)
+            for pub_type in pub_types
+        ]
+        db.session.add_all(metas)
+        db.session.flush()
 
-                assert metadata.publication_type == pub_type
-
-                db.session.delete(metadata)
-                db.session.commit()
+        for metadata, pub_type in zip(metas, pub_types):
+            assert metadata.id is not None
+            assert metadata.publication_type == pub_type
 
 
 class TestDatasetMethods:
 
     def test_dataset_str_representation(self, test_client, sample_user, sample_metadata):
-        with test_client.application.app_context():
-            dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
-            db.session.add(dataset)
-            db.session.commit()
+        dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
+        db.session.add(dataset)
+        db.session.flush()
 
-            str_repr = str(dataset)
-            assert isinstance(str_repr, str)
-            assert len(str_repr) > 0
+        str_repr = str(dataset)
+        assert isinstance(str_repr, str)
+        assert len(str_repr) > 0
 
 
 class TestDatasetRelationships:
 
     def test_dataset_metadata_relationship(self, test_client, sample_user, sample_metadata):
-        with test_client.application.app_context():
-            dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
-            db.session.add(dataset)
-            db.session.commit()
+        dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
+        db.session.add(dataset)
+        db.session.flush()
 
-            metadata = DSMetaData.query.get(sample_metadata.id)
-            assert metadata is not None
+        metadata = DSMetaData.query.get(sample_metadata.id)
+        assert metadata is not None
 
 
 class TestDatasetVersioning:
 
     def test_dataset_get_latest_version(self, test_client, sample_user, sample_metadata):
-        with test_client.application.app_context():
-            dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
-            db.session.add(dataset)
-            db.session.commit()
+        dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
+        db.session.add(dataset)
+        db.session.flush()
 
-            assert hasattr(dataset, "get_latest_version")
+        assert hasattr(dataset, "get_latest_version")
 
 
 class TestDatasetRegistry:
 
     def test_infer_kind_uvl(self, test_client):
-        with test_client.application.app_context():
-            from app.modules.dataset.registry import infer_kind_from_filename
-
-            assert infer_kind_from_filename("test.uvl") == "uvl"
-            assert infer_kind_from_filename("TEST.UVL") == "uvl"
+        assert infer_kind_from_filename("test.uvl") == "uvl"
+        assert infer_kind_from_filename("TEST.UVL") == "uvl"
 
     def test_infer_kind_gpx(self, test_client):
-        with test_client.application.app_context():
-            from app.modules.dataset.registry import infer_kind_from_filename
-
-            assert infer_kind_from_filename("track.gpx") == "gpx"
-            assert infer_kind_from_filename("ROUTE.GPX") == "gpx"
+        assert infer_kind_from_filename("track.gpx") == "gpx"
+        assert infer_kind_from_filename("ROUTE.GPX") == "gpx"
 
     def test_get_descriptor_uvl(self, test_client):
-        with test_client.application.app_context():
-            from app.modules.dataset.registry import get_descriptor
-
-            desc = get_descriptor("uvl")
-            assert desc is not None
-            assert hasattr(desc, "model_class")
+        desc = get_descriptor("uvl")
+        assert desc is not None
+        assert hasattr(desc, "model_class")
 
     def test_get_descriptor_gpx(self, test_client):
-        with test_client.application.app_context():
-            from app.modules.dataset.registry import get_descriptor
-
-            desc = get_descriptor("gpx")
-            assert desc is not None
-            assert hasattr(desc, "model_class")
+        desc = get_descriptor("gpx")
+        assert desc is not None
+        assert hasattr(desc, "model_class")
 
 
 class TestDatasetRegistryExtended:
 
     def test_infer_kind_unknown(self, test_client):
-        with test_client.application.app_context():
-            from app.modules.dataset.registry import infer_kind_from_filename
-
-            result = infer_kind_from_filename("unknown.txt")
-            # El sistema retorna "base" como fallback
-            assert result is None or result in ["unknown", "base"]
+        result = infer_kind_from_filename("unknown.txt")
+        # El sistema retorna "base" como fallback
+        assert result is None or result in ["unknown", "base"]
 
     def test_get_all_descriptors(self, test_client):
-        with test_client.application.app_context():
-            from app.modules.dataset.registry import get_all_descriptors
+        descriptors = get_all_descriptors()
+        assert isinstance(descriptors, (list, dict))
+        assert len(descriptors) > 0
 
-            descriptors = get_all_descriptors()
-            assert isinstance(descriptors, (list, dict))
-            assert len(descriptors) > 0
+    def test_get_allowed_extensions(self, test_client):
+        exts = get_allowed_extensions()
+        assert ".uvl" in exts
+        assert ".gpx" in exts
+        # Resultado memorizado: la misma tupla inmutable en cada llamada
+        assert get_allowed_extensions() is exts
 
     def test_register_descriptor(self, test_client):
-        with test_client.application.app_context():
-            from app.modules.dataset.registry import get_descriptor
-
-            # Verificar que el sistema de registro funciona
-            desc_uvl = get_descriptor("uvl")
-            desc_gpx = get_descriptor("gpx")
-            assert desc_uvl is not None
-            assert desc_gpx is not None
+        # Verificar que el sistema de registro funciona
+        desc_uvl = get_descriptor("uvl")
+        desc_gpx = get_descriptor("gpx")
+        assert desc_uvl is not None
+        assert desc_gpx is not None
+
+    def test_gpx_validate_accepts_track_or_waypoint(self, test_client, tmp_path):
+        handler = get_descriptor("gpx").handler
+        track = tmp_path / "track.gpx"
+        track.write_text('<gpx xmlns="http://www.topografix.com/GPX/1/1"><trk><trkseg/></trk></gpx>')
+        waypoint = tmp_path / "waypoint.gpx"
+        waypoint.write_text('<gpx><wpt lat="37.38" lon="-5.98"/></gpx>')
+
+        assert handler.validate(str(track)) is True
+        assert handler.validate(str(waypoint)) is True
+
+    def test_gpx_validate_rejects_invalid_files(self, test_client, tmp_path):
+        handler = get_descriptor("gpx").handler
+        cases = {
+            "no_tracks.gpx": ("<gpx></gpx>", "no tracks or waypoints"),
+            "wrong_root.gpx": ("<kml><trk/></kml>", "root element is not <gpx>"),
+            "broken.gpx": ("<gpx><metadata>", "XML parsing error"),
+        }
+        for name, (content, message) in cases.items():
+            path = tmp_path / name
+            path.write_text(content)
+            with pytest.raises(ValueError, match=message):
+                handler.validate(str(path))
+
+            with pytest.raises(ValueError, match=message):
+                handler.validate_and_checksum(str(path), hashlib.blake2b())
+
+    def test_gpx_validate_and_checksum_single_pass(self, test_client, tmp_path):
+        handler = get_descriptor("gpx").handler
+        track = tmp_path / "track.gpx"
+        track.write_text("<gpx><trk><trkseg>" + '<trkpt lat="37.38" lon="-5.98"/>' * 50_000 + "</trkseg></trk></gpx>")
+
+        hasher = hashlib.blake2b(digest_size=16)
+        size = handler.validate_and_checksum(str(track), hasher)
+
+        assert (hasher.hexdigest(), size) == calculate_checksum_and_size(str(track))
 
 
 class TestDatasetServices:
 
     def test_dataset_service_module_exists(self, test_client):
         """Verificar que el módulo de servicios existe"""
-        with test_client.application.app_context():
-            from app.modules.dataset import services
-
-            assert services is not None
+        assert services is not None
 
     def test_author_service_exists(self, test_client):
         """Verificar servicio de autores"""
-        with test_client.application.app_context():
-            from app.modules.dataset.services import AuthorService
-
-            service = AuthorService()
-            assert service is not None
+        service = AuthorService()
+        assert service is not None
 
     def test_ds_meta_data_service_exists(self, test_client):
         """Verificar servicio de metadata"""
-        with test_client.application.app_context():
-            from app.modules.dataset.services import DSMetaDataService
-
-            service = DSMetaDataService()
-            assert service is not None
+        service = DSMetaDataService()
+        assert service is not None
 
 
 class TestDatasetModelsExtended:
 
     def test_dataset_to_dict(self, test_client, sample_user, sample_metadata):
-        with test_client.application.app_context():
-            # Crear request context para to_dict
-            with test_client.application.test_request_context():
-                dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
-                db.session.add(dataset)
-                db.session.commit()
+        # Crear request context para to_dict
+        with test_client.application.test_request_context():
+            dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
+            db.session.add(dataset)
+            db.session.flush()
 
-                if hasattr(dataset, "to_dict"):
-                    result = dataset.to_dict()
-                    assert isinstance(result, dict)
+            if hasattr(dataset, "to_dict"):
+                result = dataset.to_dict()
+                assert isinstance(result, dict)
 
     def test_metadata_fields(self, test_client, sample_metadata):
-        with test_client.application.app_context():
-            # Verificar campos de metadata
-            assert hasattr(sample_metadata, "title")
-            assert hasattr(sample_metadata, "description")
-            assert sample_metadata.title == "Test Dataset"
+        # Verificar campos de metadata
+        assert hasattr(sample_metadata, "title")
+        assert hasattr(sample_metadata, "description")
+        assert sample_metadata.title == "Test Dataset"
 
     def test_dataset_get_files(self, test_client, sample_user, sample_metadata):
-        with test_client.application.app_context():
-            dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
-            db.session.add(dataset)
-            db.session.commit()
+        dataset = UVLDataset(user_id=sample_user.id, ds_meta_data_id=sample_metadata.id)
+        db.session.add(dataset)
+        db.session.flush()
+
+        # Verificar relación con feature models
+        assert hasattr(dataset, "feature_models")
+
+
+class TestZenodoSyncThrottle:
+
+    def test_sync_due_once_per_ttl_and_evicts_oldest(self, monkeypatch):
+        from app.modules.dataset import routes
+
+        monkeypatch.setattr(routes, "ZENODO_SYNC_CACHE_SIZE", 2)
+        monkeypatch.setattr(routes, "_zenodo_last_sync", routes.OrderedDict())
+
+        assert routes._zenodo_sync_due(1) is True
+        assert routes._zenodo_sync_due(1) is False
+        assert routes._zenodo_sync_due(2) is True
+        assert routes._zenodo_sync_due(3) is True
 
-            # Verificar relación con feature models
-            assert hasattr(dataset, "feature_models")
+        # Solo sale la deposition más antigua; las demás conservan su TTL
+        assert list(routes._zenodo_last_sync) == [2, 3]
+        assert routes._zenodo_sync_due(2) is False
@@ -17,7 +17,7 @@ class Hubfile(db.Model):
     def get_formatted_size(self):
         from app.modules.dataset.services import SizeService
 
-        return SizeService().get_human_readable_size(self.size)
+        return SizeService.get_human_readable_size(self.size)
 
     def get_owner_user(self) -> User:
         from app.modules.hubfile.services import HubfileService
@@ -5,7 +5,7 @@ from flask import render_template
 from app.modules.dataset.services import DataSetService
 from app.modules.featuremodel.services import FeatureModelService
 from app.modules.public import public_bp
-from app.modules.trending.services import trending
+from app.modules.trending.services import cached_trending
 
 logger = logging.getLogger(__name__)
 
@@ -34,5 +34,5 @@ def index():
         total_feature_model_downloads=total_feature_model_downloads,
         total_dataset_views=total_dataset_views,
         total_feature_model_views=total_feature_model_views,
-        top3_trending=trending(metric="downloads", period="week", limit=3),
+        top3_trending=cached_trending(metric="downloads", period="week", limit=3),
     )
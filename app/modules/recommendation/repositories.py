@@ -3,6 +3,7 @@ from datetime import datetime
 from typing import cast
 
 from sqlalchemy import func, or_
+from sqlalchemy.orm import selectinload
 from sqlalchemy.sql.elements import BinaryExpression
 
 from app.modules.dataset.models import Author, BaseDataset, DSDownloadRecord, DSMetaData
@@ -29,7 +30,12 @@ class RecommendationRepository(BaseRepository):
         - +1 * (descargas normalizadas)
         - + recencia (0..1) con ventana de 180 días
         """
-        target: BaseDataset = self.model.query.join(DSMetaData).filter(BaseDataset.id == dataset_id).first()
+        # Metadatos y autores precargados: el scoring y las vistas los leen para cada dataset
+        eager_metadata = selectinload(BaseDataset.ds_meta_data).selectinload(DSMetaData.authors)
+
+        target: BaseDataset = (
+            self.model.query.join(DSMetaData).options(eager_metadata).filter(BaseDataset.id == dataset_id).first()
+        )
         if not target:
             return []
 
@@ -42,7 +48,11 @@ class RecommendationRepository(BaseRepository):
 
         target_tags = set([t.strip().lower() for t in (target.ds_meta_data.tags or "").split(",") if t.strip()])
 
-        query = self.model.query.join(DSMetaData).outerjoin(Author, Author.ds_meta_data_id == DSMetaData.id)
+        query = (
+            self.model.query.join(DSMetaData)
+            .outerjoin(Author, Author.ds_meta_data_id == DSMetaData.id)
+            .options(eager_metadata)
+        )
         query = query.filter(BaseDataset.id != target.id)
 
         filters = []
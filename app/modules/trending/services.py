@@ -1,100 +1,149 @@
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from functools import lru_cache
 
-from sqlalchemy import func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import bindparam, case, func, select
+from sqlalchemy.orm import contains_eager, selectinload
 
 from app import db
 from app.modules.dataset.models import BaseDataset, DSDownloadRecord, DSMetaData, DSViewRecord
 from app.modules.trending.repositories import TrendingRepository
 from core.services.BaseService import BaseService
 
+# Seconds a ranking is reused by cached_trending() before the record tables are aggregated again
+TRENDING_CACHE_TTL = 60
+TRENDING_CACHE_SIZE = 64
+# Insertion order = age of the entry; the oldest entries are evicted first
+_trending_cache = OrderedDict()
+_trending_cache_lock = threading.Lock()
+
 
 class TrendingService(BaseService):
     def __init__(self):
         super().__init__(TrendingRepository())
 
 
-def trending(metric: str = "downloads", period: str = "week", limit: int = 10, **kwargs):
-    """
-    Returns a list of dicts with dataset and aggregated metrics.
-
-    Accepts extra kwargs for backward compatibility (e.g. allow_mock) and ignores them.
-    """
-
-    period_days = {"day": 1, "week": 7, "month": 30}.get(period, 7)
-    if limit <= 0:
-        return []
-    now = datetime.utcnow()
-    since_period = now - timedelta(days=period_days)
-    since_1d = now - timedelta(days=1)
-
-    def agg_subq(model, date_col, since, count_label):
-        return (
-            db.session.query(
-                getattr(model, "dataset_id").label("dataset_id"),
-                func.count(getattr(model, "id")).label(count_label),
-            )
-            .filter(getattr(model, date_col) >= since)
-            .group_by(getattr(model, "dataset_id"))
-            .subquery()
+def _counts_cte(model, date_col, name):
+    # One pass per fact table: both windows (period and last day) via conditional aggregation
+    date = getattr(model, date_col)
+    return (
+        select(
+            model.dataset_id.label("dataset_id"),
+            func.count(model.id).label("period_count"),
+            func.sum(case((date >= bindparam("since_1d"), 1), else_=0)).label("day_count"),
         )
+        .where(date >= bindparam("since_period"))
+        .group_by(model.dataset_id)
+        .cte(name)
+    )
 
-    views_p = agg_subq(DSViewRecord, "view_date", since_period, "views_p")
-    dls_p = agg_subq(DSDownloadRecord, "download_date", since_period, "downloads_p")
-    views_1d = agg_subq(DSViewRecord, "view_date", since_1d, "views_1d")
-    dls_1d = agg_subq(DSDownloadRecord, "download_date", since_1d, "downloads_1d")
 
-    Vp = func.coalesce(views_p.c.views_p, 0)
-    Dp = func.coalesce(dls_p.c.downloads_p, 0)
-    Vd = func.coalesce(views_1d.c.views_1d, 0)
-    Dd = func.coalesce(dls_1d.c.downloads_1d, 0)
+@lru_cache(maxsize=8)
+def _trending_statement(metric: str):
+    """
+    Ranking query for a metric, built once per process. Dates and limit are bind parameters,
+    so every call reuses the same statement (and its entry in SQLAlchemy's compiled cache).
+    """
+    views_cte = _counts_cte(DSViewRecord, "view_date", "views_cte")
+    dls_cte = _counts_cte(DSDownloadRecord, "download_date", "downloads_cte")
 
-    base = (
-        db.session.query(
-            BaseDataset.id.label("dataset_id"),
+    Vp = func.coalesce(views_cte.c.period_count, 0)
+    Dp = func.coalesce(dls_cte.c.period_count, 0)
+    Vd = func.coalesce(views_cte.c.day_count, 0)
+    Dd = func.coalesce(dls_cte.c.day_count, 0)
+
+    stmt = (
+        select(
+            BaseDataset,
             Vp.label("views"),
             Dp.label("downloads"),
             Vd.label("views_1d"),
             Dd.label("downloads_1d"),
         )
-        .join(DSMetaData, DSMetaData.id == BaseDataset.ds_meta_data_id)
-        .filter(DSMetaData.dataset_doi.isnot(None))
-        .outerjoin(views_p, views_p.c.dataset_id == BaseDataset.id)
-        .outerjoin(dls_p, dls_p.c.dataset_id == BaseDataset.id)
-        .outerjoin(views_1d, views_1d.c.dataset_id == BaseDataset.id)
-        .outerjoin(dls_1d, dls_1d.c.dataset_id == BaseDataset.id)
+        .join(BaseDataset.ds_meta_data)
+        .options(contains_eager(BaseDataset.ds_meta_data))
+        .where(DSMetaData.dataset_doi.isnot(None))
+        .outerjoin(views_cte, views_cte.c.dataset_id == BaseDataset.id)
+        .outerjoin(dls_cte, dls_cte.c.dataset_id == BaseDataset.id)
     )
 
     if metric == "views":
-        base = base.filter(Vp > 0).order_by(Vp.desc(), BaseDataset.id.asc())
+        stmt = stmt.where(Vp > 0).order_by(Vp.desc(), BaseDataset.id.asc())
     elif metric == "downloads":
-        base = base.filter(Dp > 0).order_by(Dp.desc(), BaseDataset.id.asc())
+        stmt = stmt.where(Dp > 0).order_by(Dp.desc(), BaseDataset.id.asc())
     elif metric == "score_v2":
         score_v2 = (Dd * 3.0) + (Dp * 2.0) + (Vd * 1.0) + (Vp * 0.5)
-        base = base.filter((Vp + Dp + Vd + Dd) > 0).order_by(score_v2.desc(), BaseDataset.id.asc())
+        stmt = stmt.where((Vp + Dp + Vd + Dd) > 0).order_by(score_v2.desc(), BaseDataset.id.asc())
     else:
         score = (Dp * 2) + Vp
-        base = base.filter((Vp + Dp) > 0).order_by(score.desc(), BaseDataset.id.asc())
+        stmt = stmt.where((Vp + Dp) > 0).order_by(score.desc(), BaseDataset.id.asc())
+
+    return stmt.limit(bindparam("limit"))
 
-    rows = base.limit(limit).all()
-    if not rows:
+
+def trending(metric: str = "downloads", period: str = "week", limit: int = 10, **kwargs):
+    """
+    Returns a list of dicts with dataset and aggregated metrics.
+
+    Accepts extra kwargs for backward compatibility (e.g. allow_mock) and ignores them.
+    """
+
+    period_days = {"day": 1, "week": 7, "month": 30}.get(period, 7)
+    if limit <= 0:
+        return []
+    now = datetime.utcnow()
+    params = {
+        "since_period": now - timedelta(days=period_days),
+        "since_1d": now - timedelta(days=1),
+        "limit": limit,
+    }
+    # Any metric other than the named ones ranks by the default score
+    statement_key = metric if metric in ("views", "downloads", "score_v2") else "score"
+
+    return [
+        {
+            "dataset": dataset,
+            "views": int(views or 0),
+            "downloads": int(downloads or 0),
+            "views_1d": int(views_1d or 0),
+            "downloads_1d": int(downloads_1d or 0),
+        }
+        for dataset, views, downloads, views_1d, downloads_1d in db.session.execute(
+            _trending_statement(statement_key), params
+        ).all()
+    ]
+
+
+def cached_trending(metric: str = "downloads", period: str = "week", limit: int = 10):
+    """
+    Like trending(), but reuses the ranking (dataset ids and counts) for TRENDING_CACHE_TTL seconds.
+
+    On a hit only the ranked datasets are loaded, by primary key, instead of re-scanning the view and
+    download records. Meant for pages where slightly stale counts are fine, such as the home page.
+    """
+    key = (metric, period, limit)
+    now = time.monotonic()
+    with _trending_cache_lock:
+        cached = _trending_cache.get(key)
+    if cached is None or now - cached[0] >= TRENDING_CACHE_TTL:
+        # The query runs outside the lock so other keys are not blocked while it runs
+        results = trending(metric=metric, period=period, limit=limit)
+        ranking = [(r["dataset"].id, {k: v for k, v in r.items() if k != "dataset"}) for r in results]
+        with _trending_cache_lock:
+            _trending_cache[key] = (now, ranking)
+            _trending_cache.move_to_end(key)
+            while len(_trending_cache) > TRENDING_CACHE_SIZE:
+                _trending_cache.popitem(last=False)
+        return results
+
+    ranking = cached[1]
+    if not ranking:
         return []
 
-    ids = [r.dataset_id for r in rows]
-    datasets = BaseDataset.query.options(selectinload(BaseDataset.ds_meta_data)).filter(BaseDataset.id.in_(ids)).all()
-    ds_map = {d.id: d for d in datasets}
-
-    results = []
-    for r in rows:
-        ds = ds_map.get(r.dataset_id)
-        if ds:
-            results.append(
-                {
-                    "dataset": ds,
-                    "views": int(r.views or 0),
-                    "downloads": int(r.downloads or 0),
-                    "views_1d": int(r.views_1d or 0),
-                    "downloads_1d": int(r.downloads_1d or 0),
-                }
-            )
-    return results
+    datasets = BaseDataset.query.options(selectinload(BaseDataset.ds_meta_data)).filter(
+        BaseDataset.id.in_([dataset_id for dataset_id, _ in ranking])
+    )
+    by_id = {dataset.id: dataset for dataset in datasets}
+    return [{"dataset": by_id[dataset_id], **counts} for dataset_id, counts in ranking if dataset_id in by_id]
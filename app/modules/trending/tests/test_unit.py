@@ -5,7 +5,7 @@ import pytest
 from app import db
 from app.modules.auth.models import User
 from app.modules.dataset.models import DSDownloadRecord, DSMetaData, DSViewRecord, UVLDataset
-from app.modules.trending.services import trending
+from app.modules.trending.services import _trending_cache, cached_trending, trending
 
 
 @pytest.fixture(scope="module")
@@ -226,3 +226,37 @@ def test_trending_negative_limit_behaviour(seeded_db):
 
     res = trending(metric="views", period="week", limit=-1)
     assert res == []
+
+
+def test_cached_trending_reuses_ranking(seeded_db):
+    create_dataset = seeded_db["create_dataset"]
+    add_downloads = seeded_db["add_downloads"]
+
+    _trending_cache.clear()
+    ds = create_dataset("Cached", "doi:cached")
+    add_downloads(ds, 40, days_ago=0)
+
+    first = cached_trending(metric="downloads", period="week", limit=1)
+    assert first[0]["dataset"].id == ds.id
+    assert first == trending(metric="downloads", period="week", limit=1)
+
+    # Dentro del TTL no se vuelve a agregar: las nuevas descargas aún no cuentan
+    add_downloads(ds, 5, days_ago=0)
+    second = cached_trending(metric="downloads", period="week", limit=1)
+    assert second[0]["dataset"].id == ds.id
+    assert second[0]["downloads"] == first[0]["downloads"]
+    _trending_cache.clear()
+
+
+def test_cached_trending_evicts_oldest_entry(seeded_db, monkeypatch):
+    import app.modules.trending.services as trending_services
+
+    monkeypatch.setattr(trending_services, "TRENDING_CACHE_SIZE", 2)
+    _trending_cache.clear()
+
+    for limit in (1, 2, 3):
+        cached_trending(metric="downloads", period="week", limit=limit)
+
+    # Al llenarse solo se descarta la entrada más antigua, no toda la caché
+    assert list(_trending_cache) == [("downloads", "week", 2), ("downloads", "week", 3)]
+    _trending_cache.clear()
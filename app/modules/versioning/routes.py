@@ -1,24 +1,29 @@
 import logging
 
-from flask import abort, flash, jsonify, redirect, render_template, request, url_for
+from flask import abort, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
 from app.modules.dataset.models import BaseDataset
+from app.modules.dataset.services import DataSetService
 from app.modules.versioning import versioning_bp
 from app.modules.versioning.models import DatasetVersion
 from app.modules.versioning.services import VersionService
 from app.modules.zenodo.services import ZenodoService
+from core.serialisers.serializer import json_response
 
 logger = logging.getLogger(__name__)
 zenodo_service = ZenodoService()
+dataset_service = DataSetService()
 
 
 @versioning_bp.route("/dataset/<int:dataset_id>/versions")
 def list_versions(dataset_id):
     """Ver historial de versiones de un dataset"""
-    dataset = BaseDataset.query.get_or_404(dataset_id)
+    dataset = dataset_service.get_with_details(dataset_id)
+    if dataset is None:
+        abort(404)
 
-    versions = dataset.versions.order_by(DatasetVersion.created_at.desc()).all()
+    versions = VersionService.get_dataset_versions(dataset_id)
 
     return render_template("versioning/list_versions.html", dataset=dataset, versions=versions)
 
@@ -26,17 +31,21 @@ def list_versions(dataset_id):
 @versioning_bp.route("/versions/<int:version1_id>/compare/<int:version2_id>")
 def compare_versions(version1_id, version2_id):
     """Comparar dos versiones de un dataset"""
-    version1 = DatasetVersion.query.get_or_404(version1_id)
-    version2 = DatasetVersion.query.get_or_404(version2_id)
+    # Una sola consulta: todas las versiones del dataset de version1 (incluye ambas si son del mismo dataset)
+    all_versions = VersionService.get_sibling_versions(version1_id)
+    versions_by_id = {v.id: v for v in all_versions}
 
-    if version1.dataset_id != version2.dataset_id:
+    version1 = versions_by_id.get(version1_id)
+    if version1 is None:
+        abort(404)
+
+    version2 = versions_by_id.get(version2_id)
+    if version2 is None:
+        DatasetVersion.query.get_or_404(version2_id)
         flash("Versions must belong to the same dataset", "danger")
         abort(400)
 
     dataset = version1.dataset
-    all_versions = (
-        DatasetVersion.query.filter_by(dataset_id=dataset.id).order_by(DatasetVersion.created_at.desc()).all()
-    )
 
     if version1.created_at < version2.created_at:
         version1, version2 = version2, version1
@@ -57,7 +66,9 @@ def compare_versions(version1_id, version2_id):
 @login_required
 def create_version(dataset_id):
     """Crear una nueva versión manualmente (solo propietario)"""
-    dataset = BaseDataset.query.get_or_404(dataset_id)
+    dataset = dataset_service.get_with_details(dataset_id)
+    if dataset is None:
+        abort(404)
 
     if dataset.user_id != current_user.id:
         abort(403)
@@ -98,11 +109,12 @@ def create_version(dataset_id):
 @versioning_bp.route("/api/dataset/<int:dataset_id>/versions")
 def api_list_versions(dataset_id):
     """API para obtener versiones de un dataset (JSON)"""
-    dataset = BaseDataset.query.get_or_404(dataset_id)
-
-    versions = [v.to_dict() for v in dataset.versions.all()]
+    versions = [v.to_dict() for v in VersionService.get_dataset_versions(dataset_id)]
+    if not versions:
+        # Sin versiones: 404 solo si tampoco existe el dataset
+        BaseDataset.query.get_or_404(dataset_id)
 
-    return jsonify({"dataset_id": dataset_id, "version_count": len(versions), "versions": versions})
+    return json_response({"dataset_id": dataset_id, "version_count": len(versions), "versions": versions})
 
 
 @versioning_bp.route("/api/version/<int:version_id>")
@@ -110,4 +122,4 @@ def api_get_version(version_id):
     """Obtener detalles de una versión específica (JSON)"""
     version = DatasetVersion.query.get_or_404(version_id)
 
-    return jsonify(version.to_dict())
+    return json_response(version.to_dict())
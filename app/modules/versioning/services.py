@@ -1,12 +1,24 @@
 import logging
 
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
 from app import db
+from app.modules.auth.models import User
 from app.modules.dataset.models import BaseDataset, GPXDataset, UVLDataset
+from app.modules.dataset.repositories import DataSetRepository
 from app.modules.versioning.models import DatasetVersion, GPXDatasetVersion, UVLDatasetVersion
 from app.modules.versioning.repositories import VersioningRepository
 
 logger = logging.getLogger(__name__)
 
+# (major, minor, patch) -> nueva versión según el tipo de incremento; cualquier otro valor cuenta como 'patch'
+_VERSION_BUMPS = {
+    "major": lambda major, minor, patch: (major + 1, 0, 0),
+    "minor": lambda major, minor, patch: (major, minor + 1, 0),
+    "patch": lambda major, minor, patch: (major, minor, patch + 1),
+}
+
 
 class VersionService:
     """Servicio para gestionar versiones de datasets"""
@@ -15,7 +27,9 @@ class VersionService:
         self.repository = VersioningRepository()
 
     @staticmethod
-    def create_version(dataset: BaseDataset, changelog: str, user, bump_type: str = "patch") -> DatasetVersion:
+    def create_version(
+        dataset: BaseDataset, changelog: str, user, bump_type: str = "patch", commit: bool = True
+    ) -> DatasetVersion:
         """
         Crear una nueva versión del dataset.
         Captura el estado actual y lo guarda como snapshot.
@@ -25,7 +39,11 @@ class VersionService:
             changelog: Descripción de cambios
             user: Usuario que crea la versión
             bump_type: Tipo de incremento ('major', 'minor', 'patch')
+            commit: Si es False la versión solo se añade a la sesión (para crear varias y confirmar una vez)
         """
+        # Snapshot y métricas recorren todos los feature models y sus ficheros: se cargan de una vez
+        dataset = DataSetRepository().get_with_files(dataset.id) or dataset
+
         last_version = dataset.get_latest_version()
 
         new_version_number = VersionService._increment_version(
@@ -58,17 +76,8 @@ class VersionService:
                 version.total_features = dataset.calculate_total_features() or 0
                 version.total_constraints = dataset.calculate_total_constraints() or 0
 
-                # Contar modelos correctamente
-                if hasattr(dataset.feature_models, "count") and callable(dataset.feature_models.count):
-                    # Es una query de SQLAlchemy
-                    try:
-                        version.model_count = dataset.feature_models.count()
-                    except TypeError:
-                        # Es una lista, usar len()
-                        version.model_count = len(dataset.feature_models) if dataset.feature_models else 0
-                else:
-                    # Es una lista
-                    version.model_count = len(dataset.feature_models) if dataset.feature_models else 0
+                # La colección ya está cargada (get_with_files): contarla no cuesta otra consulta
+                version.model_count = len(dataset.feature_models)
 
             except Exception as e:
                 logger.warning(f"Could not calculate UVL metrics for dataset {dataset.id}: {str(e)}")
@@ -77,7 +86,8 @@ class VersionService:
                 version.model_count = 0
 
         db.session.add(version)
-        db.session.commit()
+        if commit:
+            db.session.commit()
 
         return version
 
@@ -93,12 +103,11 @@ class VersionService:
     @staticmethod
     def _create_files_snapshot(dataset):
         """Crear un snapshot JSON de todos los archivos actuales"""
-        snapshot = {}
-        for fm in dataset.feature_models:
-            if hasattr(fm, "files"):
-                for file in fm.files:
-                    snapshot[file.name] = {"id": file.id, "checksum": file.checksum, "size": file.size}
-        return snapshot
+        return {
+            file.name: {"id": file.id, "checksum": file.checksum, "size": file.size}
+            for fm in dataset.feature_models
+            for file in fm.files
+        }
 
     @staticmethod
     def _increment_version(version_str: str, bump_type: str = "patch") -> str:
@@ -111,13 +120,32 @@ class VersionService:
             return "1.0.0"
 
         major, minor, patch = map(int, version_str.split("."))
+        bump = _VERSION_BUMPS.get(bump_type, _VERSION_BUMPS["patch"])
+        return "%d.%d.%d" % bump(major, minor, patch)
 
-        if bump_type == "major":
-            return f"{major + 1}.0.0"
-        elif bump_type == "minor":
-            return f"{major}.{minor + 1}.0"
-        else:
-            return f"{major}.{minor}.{patch + 1}"
+    @staticmethod
+    def get_dataset_versions(dataset_id: int) -> list:
+        """Versiones de un dataset (la más reciente primero) con su autor y el perfil de este ya cargados."""
+        return (
+            DatasetVersion.query.options(joinedload(DatasetVersion.created_by).joinedload(User.profile))
+            .filter(DatasetVersion.dataset_id == dataset_id)
+            .order_by(DatasetVersion.created_at.desc())
+            .all()
+        )
+
+    @staticmethod
+    def get_sibling_versions(version_id: int) -> list:
+        """
+        Todas las versiones del dataset al que pertenece `version_id` (la más reciente primero),
+        con el dataset ya cargado. Una sola consulta; lista vacía si la versión no existe.
+        """
+        dataset_id = select(DatasetVersion.dataset_id).where(DatasetVersion.id == version_id).scalar_subquery()
+        return (
+            DatasetVersion.query.options(joinedload(DatasetVersion.dataset))
+            .filter(DatasetVersion.dataset_id == dataset_id)
+            .order_by(DatasetVersion.created_at.desc())
+            .all()
+        )
 
     @staticmethod
     def compare_versions(version1_id: int, version2_id: int):
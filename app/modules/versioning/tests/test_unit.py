@@ -79,6 +79,10 @@ class TestVersionIncrement:
         result = VersionService._increment_version("99.99.99", "patch")
         assert result == "99.99.100"
 
+    def test_increment_unknown_bump_type_is_patch(self):
+        result = VersionService._increment_version("1.2.3", "unknown")
+        assert result == "1.2.4"
+
 
 class TestFileSnapshot:
 
@@ -241,6 +245,15 @@ class TestVersionModel:
 
             assert "Version 1.0.0" in str(version)
 
+    def test_create_version_without_commit_stays_pending(self, test_client, sample_uvl_dataset, sample_user):
+        with test_client.application.app_context():
+            dataset = UVLDataset.query.get(sample_uvl_dataset)
+
+            version = VersionService.create_version(dataset, "Pending", sample_user, "patch", commit=False)
+
+            assert version in db.session.new
+            db.session.rollback()
+
 
 class TestVersioningRoutesIntegration:
 
@@ -317,3 +330,21 @@ class TestVersioningEdgeCases:
 
             count = UVLDatasetVersion.query.filter_by(dataset_id=dataset.id).count()
             assert count == 2
+
+    def test_get_dataset_versions_only_returns_that_dataset(
+        self, test_client, sample_uvl_dataset, sample_gpx_dataset, sample_user
+    ):
+        with test_client.application.app_context():
+            from app.modules.dataset.models import GPXDataset, UVLDataset
+
+            dataset1 = UVLDataset.query.get(sample_uvl_dataset)
+            dataset2 = GPXDataset.query.get(sample_gpx_dataset)
+
+            v1 = VersionService.create_version(dataset1, "v1", sample_user, "patch")
+            v2 = VersionService.create_version(dataset1, "v2", sample_user, "patch")
+            VersionService.create_version(dataset2, "v1", sample_user, "patch")
+
+            versions = VersionService.get_dataset_versions(dataset1.id)
+
+            assert {v.id for v in versions} == {v1.id, v2.id}
+            assert all(v.created_by.id == sample_user.id for v in versions)
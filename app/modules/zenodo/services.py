@@ -1,11 +1,13 @@
 import logging
 import os
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
 
 import requests
 from dotenv import load_dotenv
 from flask import Response, jsonify
 from flask_login import current_user
+from requests.adapters import HTTPAdapter
 
 from app.modules.dataset.models import BaseDataset
 from app.modules.featuremodel.models import FeatureModel
@@ -16,6 +18,19 @@ from core.services.BaseService import BaseService
 logger = logging.getLogger(__name__)
 load_dotenv()
 
+# Subidas simultáneas de ficheros a una misma deposición (más hilos no aceleran: el cuello es Zenodo)
+ZENODO_UPLOAD_WORKERS = 4
+ZENODO_HTTP_POOL_SIZE = 16
+
+
+def _build_http_session() -> requests.Session:
+    """Sesión HTTP con pool de conexiones keep-alive, compartida por los hilos de subida."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=ZENODO_HTTP_POOL_SIZE, pool_maxsize=ZENODO_HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
 class ZenodoService(BaseService):
     def __init__(self):
@@ -23,6 +38,7 @@ class ZenodoService(BaseService):
         self.ZENODO_ACCESS_TOKEN: Optional[str] = self.get_zenodo_access_token()
         self.ZENODO_API_URL: str = self.get_zenodo_url()
         self.headers = {"Content-Type": "application/json"}
+        self.http = _build_http_session()
 
     # -----------------------------
     # Config helpers
@@ -321,7 +337,7 @@ class ZenodoService(BaseService):
         try:
             with open(file_path, "rb") as fh:
                 files = {"file": fh}
-                response = requests.post(publish_url, params=self._params(), data=data, files=files, timeout=60)
+                response = self.http.post(publish_url, params=self._params(), data=data, files=files, timeout=60)
         except FileNotFoundError:
             raise Exception(f"File not found: {file_path}")
 
@@ -330,6 +346,19 @@ class ZenodoService(BaseService):
             raise Exception(error_message)
         return response.json()
 
+    def upload_files(
+        self, dataset: BaseDataset, deposition_id: int, feature_models: Iterable[FeatureModel], user=None
+    ) -> List[dict]:
+        """
+        Sube los ficheros de varios feature models a una deposición en paralelo.
+        Si alguna subida falla, se relanza su excepción.
+        """
+        user = current_user._get_current_object() if user is None else user
+        with ThreadPoolExecutor(max_workers=ZENODO_UPLOAD_WORKERS, thread_name_prefix="zenodo-upload") as executor:
+            return list(
+                executor.map(lambda fm: self.upload_file(dataset, deposition_id, fm, user=user), feature_models)
+            )
+
     def publish_deposition(self, deposition_id: int) -> dict:
         """
         Publica una deposición.
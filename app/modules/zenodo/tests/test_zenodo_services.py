@@ -343,7 +343,7 @@ class TestZenodoServiceDOI:
 class TestZenodoServiceFileUpload:
     """Tests para carga de archivos"""
 
-    @patch("app.modules.zenodo.services.requests.post")
+    @patch("app.modules.zenodo.services.requests.Session.post")
     @patch("builtins.open", create=True)
     def test_upload_file_success(
         self, mock_open, mock_post, test_client, sample_dataset, sample_feature_model, monkeypatch
@@ -385,7 +385,7 @@ class TestZenodoServiceFileUpload:
                 if os.path.exists(file_dir):
                     os.rmdir(file_dir)
 
-    @patch("app.modules.zenodo.services.requests.post")
+    @patch("app.modules.zenodo.services.requests.Session.post")
     def test_upload_file_not_found(self, mock_post, test_client, sample_dataset, sample_feature_model):
         """Test: Archivo no encontrado"""
         with test_client.application.app_context():
@@ -396,7 +396,7 @@ class TestZenodoServiceFileUpload:
             with pytest.raises(Exception, match="File not found"):
                 service.upload_file(dataset, 123, fm, user=dataset.user)
 
-    @patch("app.modules.zenodo.services.requests.post")
+    @patch("app.modules.zenodo.services.requests.Session.post")
     @patch("builtins.open", create=True)
     def test_upload_file_failure(
         self, mock_open, mock_post, test_client, sample_dataset, sample_feature_model, monkeypatch
@@ -438,6 +438,26 @@ class TestZenodoServiceFileUpload:
                 if os.path.exists(file_dir):
                     os.rmdir(file_dir)
 
+    def test_upload_files_uploads_every_feature_model(self, test_client):
+        """Test: Subida en paralelo de varios ficheros, resultados en orden"""
+        with test_client.application.app_context():
+            service = ZenodoService()
+            with patch.object(
+                service, "upload_file", side_effect=lambda dataset, deposition_id, fm, user=None: {"fm": fm}
+            ) as mock_upload:
+                result = service.upload_files("dataset", 123, ["a", "b", "c"], user="user")
+
+            assert [r["fm"] for r in result] == ["a", "b", "c"]
+            assert mock_upload.call_count == 3
+
+    def test_upload_files_propagates_errors(self, test_client):
+        """Test: Si una subida falla, upload_files relanza el error"""
+        with test_client.application.app_context():
+            service = ZenodoService()
+            with patch.object(service, "upload_file", side_effect=Exception("Failed to upload files")):
+                with pytest.raises(Exception, match="Failed to upload files"):
+                    service.upload_files("dataset", 123, ["a"], user="user")
+
 
 class TestZenodoServiceMetadata:
     """Tests para metadatos"""
@@ -181,7 +181,7 @@ class TestZenodoServiceVersioning:
 
     @patch("app.modules.zenodo.services.requests.put")
     @patch("app.modules.zenodo.services.requests.get")
-    @patch("app.modules.zenodo.services.requests.post")
+    @patch("app.modules.zenodo.services.requests.Session.post")
     def test_create_new_version_with_new_files(
         self,
         mock_post,
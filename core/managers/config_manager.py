@@ -1,6 +1,10 @@
 import os
 import secrets
 
+import msgspec
+
+from core.serialisers.serializer import dumps_json
+
 
 class ConfigManager:
     def __init__(self, app):
@@ -30,9 +34,13 @@ class Config:
         f"{os.getenv('MARIADB_DATABASE', 'default_db')}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # JSON columns (e.g. DatasetVersion.files_snapshot) go through msgspec instead of the stdlib json module
+    SQLALCHEMY_ENGINE_OPTIONS = {"json_serializer": dumps_json, "json_deserializer": msgspec.json.decode}
     TIMEZONE = "Europe/Madrid"
     TEMPLATES_AUTO_RELOAD = True
     UPLOAD_FOLDER = "uploads"
+    # Internal nginx location that serves uploads/ (empty = Flask streams the files itself)
+    DOWNLOAD_ACCEL_REDIRECT_PREFIX = os.getenv("DOWNLOAD_ACCEL_REDIRECT_PREFIX", "")
 
 
 class DevelopmentConfig(Config):
@@ -12,12 +12,14 @@ class BaseSeeder:
     def run(self):
         raise NotImplementedError("The 'run' method must be implemented by the child class.")
 
-    def seed(self, data):
+    def seed(self, data, commit=True):
         """
         Attempts to insert a list of model objects and returns them with their IDs assigned after insertion.
         Throws an exception if data insertion fails.
 
         :param data: List of model objects to insert.
+        :param commit: Commit right away. With False the objects are only flushed (IDs are still assigned)
+            and the caller commits once at the end, so a multi-step seeder runs in a single transaction.
         :return: List of model objects with IDs assigned.
         """
         if not data:
@@ -29,10 +31,13 @@ class BaseSeeder:
 
         try:
             self.db.session.add_all(data)
-            self.db.session.commit()
+            if commit:
+                self.db.session.commit()
+            else:
+                self.db.session.flush()
         except IntegrityError as e:
             self.db.session.rollback()
             raise Exception(f"Failed to insert data into `{model.__tablename__}` table. Error: {e}")
 
-        # After committing, the `data` objects should have their IDs assigned.
+        # After committing (or flushing), the `data` objects should have their IDs assigned.
         return data
@@ -4,16 +4,40 @@ from selenium import webdriver
 from selenium.webdriver.firefox.service import Service
 from webdriver_manager.firefox import GeckoDriverManager
 
+# Clear cookies when the browser quits but keep the HTTP cache on disk
+PERSISTENT_PROFILE_PREFS = {
+    "privacy.sanitize.sanitizeOnShutdown": True,
+    "privacy.clearOnShutdown.cookies": True,
+    "privacy.clearOnShutdown.cache": False,
+    "privacy.clearOnShutdown_v2.cookiesAndStorage": True,
+    "privacy.clearOnShutdown_v2.cache": False,
+}
 
-def initialize_driver():
+
+def default_profile_dir():
+    cache_home = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    worker = os.getenv("PYTEST_XDIST_WORKER", "main")
+    return os.path.join(cache_home, "trackhub-selenium", f"worker-{worker}")
+
+
+def initialize_driver(profile_dir=None):
     options = webdriver.FirefoxOptions()
 
+    if profile_dir:
+        # A persistent profile per worker lets static assets hit the browser cache between runs
+        os.makedirs(profile_dir, exist_ok=True)
+        options.add_argument("-profile")
+        options.add_argument(profile_dir)
+        for name, value in PERSISTENT_PROFILE_PREFS.items():
+            options.set_preference(name, value)
+
     snap_tmp = os.path.expanduser("~/snap/firefox/common/tmp")
     os.makedirs(snap_tmp, exist_ok=True)
     os.environ["TMPDIR"] = snap_tmp
 
     service = Service(GeckoDriverManager().install())
-    driver = webdriver.Firefox(service=service, options=options)
+    # Reuse one HTTP connection to geckodriver for every WebDriver command
+    driver = webdriver.Firefox(service=service, options=options, keep_alive=True)
     return driver
 
 
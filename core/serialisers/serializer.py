@@ -1,5 +1,10 @@
 from datetime import datetime
 
+import msgspec
+from flask import current_app
+
+_json_encoder = msgspec.json.Encoder()
+
 
 def convert_value(value):
     if isinstance(value, datetime):
@@ -29,3 +34,22 @@ class Serializer:
                     attr = attr()
                 serialized_data[key] = convert_value(attr)
         return serialized_data
+
+
+def encode_json(data) -> bytes:
+    """Encode data to JSON bytes with msgspec, e.g. to cache an already-serialised payload."""
+    return _json_encoder.encode(data)
+
+
+def dumps_json(data) -> str:
+    """msgspec counterpart of json.dumps, used by SQLAlchemy to serialise JSON columns."""
+    return _json_encoder.encode(data).decode()
+
+
+def json_response(data, status: int = 200):
+    """Like flask.jsonify, but encodes with msgspec (C encoder, several times faster than stdlib json).
+
+    Pre-encoded bytes (see encode_json) are sent as-is.
+    """
+    body = data if isinstance(data, bytes) else _json_encoder.encode(data)
+    return current_app.response_class(body, status=status, mimetype="application/json")